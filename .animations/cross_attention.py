@@ -25,7 +25,8 @@ from random import randint
 from src.tensorspec.vae.mm_vae import MM_VAE, MM_VAE_WITH_DATA
 from src.tensorspec.matrices.flat import FlatMatrix3DImage
 from src.tensorspec.node.net import NetNode
-from src.tensorspec.relation.bound_box import bounding_moject
+from src.tensorspec.relation.bound_box import bounding_moject, bounding_tex_strings
+from src.tensorspec.utils.latex import precompile_tex
 
 
 class Example(MovingCameraScene):
@@ -35,12 +36,15 @@ class Example(MovingCameraScene):
 
     def construct(self):
         self.camera.background_color = WHITE
+        box_label = r"Transformers Encoder\\(Cross Attention)"
+        precompile_tex([*MM_VAE_WITH_DATA.tex_strings(self.font_size), *bounding_tex_strings(box_label)])  # one latex run
+
         # make ====
         mm_vae = MM_VAE_WITH_DATA(font_size=self.font_size).move_to(ORIGIN)
         self.add(mm_vae)
 
         # box
-        box = bounding_moject(Group(*mm_vae.vae.latent_arrows), label=r"Transformers Encoder\\(Cross Attention)")
+        box = bounding_moject(mm_vae.vae.latent_arrows, label=box_label)
         self.add(box)
 
         # animate ----
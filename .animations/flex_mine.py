@@ -33,6 +33,7 @@ from src.tensorspec.matrices.flat import FlatMatrix3D, FlatMatrix3DImage
 from pathlib import Path
 from src.tensorspec.relation.arrow import ConnectionArrow
 from src.tensorspec.node.net import NetNode
+from src.tensorspec.utils.latex import precompile_tex
 
 
 class Example(MovingCameraScene):
@@ -40,6 +41,16 @@ class Example(MovingCameraScene):
         super().__init__(*args, **kwargs)
 
     def construct(self):
+        # -------- typeset every label with one latex run --------
+        matrix_labels = ["Conv", "MaxPool", "Logits", "Binary Mask", "Binary Mask Inverse", "Sum"]
+        node_labels = ["Logits Function", "Masking Function"]
+        precompile_tex(
+            [
+                *[label for text in matrix_labels for label in FlatMatrix3D.tex_strings(label=text)],
+                *[label for text in node_labels for label in NetNode.tex_strings(text=text)],
+            ]
+        )
+
         # -------- make the init matrices --------
         matrix_image = FlatMatrix3DImage(
             image_path=Path("assets", "private_images", "puppy.png"), dimensions=(3, 32, 32), label="Image"
@@ -3,7 +3,6 @@ VAE vs Supervised Learning
 """
 
 from pathlib import Path
-from itertools import product
 import toml
 from manim import tempconfig, WHITE, MovingCameraScene, LEFT
 from manim.utils.file_ops import open_file as open_media_file
@@ -32,6 +31,7 @@ from random import randint
 from src.tensorspec.vae.mm_vae import MM_VAE_WITH_DATA
 from src.tensorspec.vae.coders import Coder
 from src.tensorspec.relation.arrow import ConnectionArrow
+from src.tensorspec.relation.pairwise import PairwiseArrows
 from src.tensorspec.node.net import NetNode
 
 
@@ -74,14 +74,13 @@ class Example(MovingCameraScene):
         self.add(group_sources)
 
         # make arrows for all combinations
-        combinations = list(
-            product(
-                [i.get_right() for i in nodes_sources],
-                [i.get_left() for i in [mm_vae.flat_fmri, mm_vae.flat_mri, mm_vae.node_genetic_data]],
-            )
+        arrows_in = PairwiseArrows(
+            _from=(nodes_sources, RIGHT),
+            to=([mm_vae.flat_fmri, mm_vae.flat_mri, mm_vae.node_genetic_data], LEFT),
+            color=BLACK,
+            stroke_width=3,
         )
-        arrows_in = [Arrow(*combo, color=BLACK, max_tip_length_to_length_ratio=0, stroke_width=3) for combo in combinations]
-        self.add(*arrows_in)
+        self.add(arrows_in)
 
         # animate ----
         transforms = [
@@ -0,0 +1,172 @@
+"""
+Render benchmark of TensorVisualizationScene: every combination of tensor shape, engine and renderer is rendered at low quality
+with a fixed seed, each in a fresh process, and the timings / memory / output size are written to a JSON file.
+With --baseline the results are compared against an earlier JSON file and the script exits with 1 when a metric regressed.
+
+e.g.
+    python _benchmark.py --shapes 1x3x6x6 2x4x12x12 --engines matplotlib projected --output benchmark.json
+    python _benchmark.py --baseline benchmark.json --output benchmark_new.json
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+import subprocess
+import tempfile
+import argparse
+import platform
+import resource
+import json
+import time
+import sys
+
+METRICS = ["setup_time", "construction_time", "frame_time", "peak_rss_mb", "output_bytes"]  # lower is better for all of them
+SETUP_STAGES = ["scene.lod", "scene.stats", "scene.prerender"]  # the work done once for the whole sequence, before any frame
+
+
+def run_case(shape, engine, renderer, num_tensors, seed, quality):
+    """Renders one scene and returns its metrics; meant for a fresh process, since peak RSS is measured per process."""
+    from manim import tempconfig, config
+
+    # before the scene module is imported: its mobject classes are built for the renderer set at import time
+    config.renderer = renderer
+    from src.tensorspec.scenes.tensors_distribution import TensorVisualizationScene
+    from src.tensorspec.utils import profiling
+    import torch
+
+    class BenchmarkScene(TensorVisualizationScene):
+        construction_time = 0.0
+
+        def construct(self):
+            torch.manual_seed(seed)
+            tensors = [torch.rand(shape) for _ in range(num_tensors)]
+            labels = [f"Tensor {i}" for i in range(num_tensors)]
+            matrix_kwargs = {"cache_dir": None} if engine == "matplotlib" else None  # no cache: every run plots everything
+            super().construct(tensors=tensors, labels=labels, engine=engine, matrix_kwargs=matrix_kwargs)
+
+        def make_chart(self, *args, **kwargs):
+            start = time.perf_counter()
+            chart = super().make_chart(*args, **kwargs)
+            self.construction_time += time.perf_counter() - start
+            return chart
+
+        def make_frame(self, *args, **kwargs):
+            start = time.perf_counter()
+            frame = super().make_frame(*args, **kwargs)
+            self.construction_time += time.perf_counter() - start
+            return frame
+
+    with tempfile.TemporaryDirectory() as media_dir, tempconfig(
+        {
+            "quality": quality,
+            "disable_caching": True,
+            "write_to_movie": True,
+            "preview": False,
+            "media_dir": media_dir,
+            "verbosity": "ERROR",
+        }
+    ):
+        profiling.enable()  # for the timers of the up-front stages
+        start = time.perf_counter()
+        scene = BenchmarkScene()
+        scene.render()
+        total_time = time.perf_counter() - start
+        timers = profiling.report()["timers"]
+        setup_time = sum(timers[stage]["total"] for stage in SETUP_STAGES if stage in timers)
+
+        num_frames = max(round(scene.renderer.time * config.frame_rate), 1)
+        movie = Path(scene.renderer.file_writer.movie_file_path)
+        output_bytes = movie.stat().st_size if movie.exists() else None
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss /= 2**20 if sys.platform == "darwin" else 2**10  # bytes on macOS, kilobytes on linux
+    return {
+        "total_time": total_time,
+        "setup_time": setup_time,
+        "construction_time": scene.construction_time,
+        "frame_time": (total_time - setup_time - scene.construction_time) / num_frames,
+        "num_frames": num_frames,
+        "peak_rss_mb": peak_rss,
+        "output_bytes": output_bytes,
+    }
+
+
+def run_isolated(*case):
+    """run_case in a fresh process; errors (e.g. no OpenGL context on a headless machine) are recorded instead of raised."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        try:
+            return executor.submit(run_case, *case).result()
+        except Exception as error:
+            return {"error": f"{type(error).__name__}: {error}"}
+
+
+def environment():
+    from importlib.metadata import version
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "manim": version("manim"),
+        "torch": version("torch"),
+        "matplotlib": version("matplotlib"),
+        "commit": commit,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Prints every metric next to its baseline; returns the cases and metrics that got worse by more than tolerance."""
+    regressions = []
+    for case, metrics in results.items():
+        reference = baseline.get(case)
+        if reference is None or "error" in metrics or "error" in reference:
+            continue
+        for metric in METRICS:
+            new, old = metrics.get(metric), reference.get(metric)
+            if not new or not old:
+                continue
+            ratio = new / old
+            flag = "REGRESSION" if ratio > 1 + tolerance else ""
+            print(f"{case:<40} {metric:<18} {old:>12.4g} -> {new:>12.4g} ({ratio - 1:+.1%}) {flag}")
+            if flag:
+                regressions.append((case, metric))
+    return regressions
+
+
+def parse_shape(text):
+    return tuple(int(i) for i in text.split("x"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shapes", nargs="+", type=parse_shape, default=[(1, 3, 6, 6), (2, 4, 12, 12)], help="e.g. 2x4x12x12")
+    parser.add_argument("--engines", nargs="+", default=["matplotlib", "native", "projected"])
+    parser.add_argument("--renderers", nargs="+", default=["cairo", "opengl"])
+    parser.add_argument("--num-tensors", type=int, default=3, help="length of the tensor sequence of each scene")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quality", default="low_quality")
+    parser.add_argument("--output", type=Path, default=Path("benchmark.json"))
+    parser.add_argument("--baseline", type=Path, default=None, help="an earlier --output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative increase of a metric counted as a regression")
+    args = parser.parse_args()
+
+    results = {}
+    for shape in args.shapes:
+        for engine in args.engines:
+            for renderer in args.renderers:
+                case = f"{engine}/{renderer}/{'x'.join(map(str, shape))}"
+                print(f"running {case}", flush=True)
+                results[case] = run_isolated(shape, engine, renderer, args.num_tensors, args.seed, args.quality)
+
+    settings = {key: getattr(args, key) for key in ["num_tensors", "seed", "quality"]}
+    args.output.write_text(json.dumps({"environment": environment(), "settings": settings, "results": results}, indent=2))
+    print(f"results written to {args.output}")
+
+    if args.baseline is not None:
+        regressions = compare(results, json.loads(args.baseline.read_text())["results"], args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.tolerance:.0%}")
+            sys.exit(1)
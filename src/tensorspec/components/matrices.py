@@ -1,10 +1,26 @@
 """
-Script making the stack of 3D cubes at the tensor -> 3D matrix section using manim native cubes.
+Script making the stack of 3D cubes at the tensor -> 3D matrix section using manim native mobjects.
+The voxel geometry of a whole tensor is generated in one numpy pass and merged into VMobjects (one per diagonal layer of voxels
+and colour level) instead of building a separate Cube for every element.
 """
 
-from manim import VGroup, Text, DOWN, DEGREES, Cube, BLUE, RED, UP, color_to_rgb, rgb_to_color, Mobject
-from torch import tensor
+from manim import VGroup, VMobject, Text, DOWN, DEGREES, BLUE, RED, UP, BLACK, color_to_rgb, rgb_to_color, Mobject
+from torch import tensor, Size
 import numpy as np
+from src.tensorspec.utils.stats import normalize
+
+VIEW_ANGLE = -30 * DEGREES  # rotation about the y axis applied to the whole stack of cubes
+
+# -------- the 6 faces of a unit cube: (axis, sign, corners walked around the face in units of half the side length) --------
+# every face starts at a corner that no other face starts at, so consecutive faces never fuse into one subpath
+FACE_CORNERS = [
+    (0, 1, [(1, 1, 1), (1, -1, 1), (1, -1, -1), (1, 1, -1)]),
+    (0, -1, [(-1, -1, -1), (-1, 1, -1), (-1, 1, 1), (-1, -1, 1)]),
+    (1, 1, [(-1, 1, -1), (1, 1, -1), (1, 1, 1), (-1, 1, 1)]),
+    (1, -1, [(1, -1, 1), (-1, -1, 1), (-1, -1, -1), (1, -1, -1)]),
+    (2, 1, [(-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1)]),
+    (2, -1, [(1, 1, -1), (-1, 1, -1), (-1, -1, -1), (1, -1, -1)]),
+]
 
 
 def interpolate_color(color1, color2, alpha):
@@ -15,38 +31,172 @@ def interpolate_color(color1, color2, alpha):
     return rgb_to_color(interpolated_rgb)
 
 
+def interpolate_colors(color1, color2, alphas):
+    """Vectorised interpolate_color; returns an array of rgb values of shape alphas.shape + (3,)."""
+    rgb1 = np.array(color_to_rgb(color1))
+    rgb2 = np.array(color_to_rgb(color2))
+    alphas = np.asarray(alphas, dtype=float)[..., None]
+    return (1 - alphas) * rgb1 + alphas * rgb2
+
+
+def voxel_faces(occupied, spacing, side_length, view=None):
+    """
+    Computes the faces of a voxel grid. With a view direction, the faces pointing away from the camera are culled, at any spacing;
+    when the voxels also touch (spacing <= side_length), the faces between two occupied voxels are hidden and culled as well.
+    Parameters:
+        - occupied (numpy.ndarray): A 3D boolean array marking the voxels to draw.
+        - spacing (float): The distance between the centres of two neighbouring voxels.
+        - side_length (float): The side length of each voxel.
+        - view (numpy.ndarray, optional): The direction towards the camera; None keeps the back faces.
+    Returns:
+        - corners (numpy.ndarray): (n_faces, 4, 3) corner coordinates of each face.
+        - normals (numpy.ndarray): (n_faces, 3) outward unit normal of each face.
+        - voxel_index (numpy.ndarray): (n_faces,) flat index of the voxel each face belongs to.
+    """
+    occupied = np.asarray(occupied, dtype=bool)
+    padded = np.pad(occupied, 1)
+    centers = np.stack(np.indices(occupied.shape), axis=-1).reshape(-1, 3) * spacing
+    flat_occupied = occupied.reshape(-1)
+    touching = spacing <= side_length
+
+    corners, normals, voxel_index = [], [], []
+    for axis, sign, offsets in FACE_CORNERS:
+        if view is not None and sign * view[axis] <= 1e-9:
+            continue  # back face, or seen edge on
+        # the neighbour in the direction of the face normal, read from the zero padded grid
+        shift = [sign * (a == axis) for a in range(3)]
+        neighbour = padded[tuple(slice(1 + s, 1 + s + n) for s, n in zip(shift, occupied.shape))]
+        exposed = np.flatnonzero(flat_occupied & ~neighbour.reshape(-1) if touching else flat_occupied)
+        normal = np.zeros(3)
+        normal[axis] = sign
+
+        corners.append(centers[exposed, None, :] + np.array(offsets) * side_length / 2)
+        normals.append(np.broadcast_to(normal, (len(exposed), 3)))
+        voxel_index.append(exposed)
+
+    return np.concatenate(corners), np.concatenate(normals), np.concatenate(voxel_index)
+
+
+def voxel_layers(voxel_index, normals, shape, view):
+    """
+    The painter's order layer of each face: the diagonal layer of its voxel, the sum of the voxel's grid indices each counted
+    towards the camera. With spacing >= side length, the voxels of one layer never overlap on screen and a voxel can only hide
+    voxels of earlier layers, so drawing the layers back to front is a valid painter's order whatever the order within a layer.
+    The back faces of a layer come before its front faces; they overlap them on screen.
+    Parameters:
+        - voxel_index (numpy.ndarray): (n_faces,) flat index of the voxel of each face, as returned by voxel_faces.
+        - normals (numpy.ndarray): (n_faces, 3) outward unit normal of each face, as returned by voxel_faces.
+        - shape (tuple): The shape of the voxel grid.
+        - view (numpy.ndarray): The direction towards the camera.
+    Returns:
+        - numpy.ndarray: (n_faces,) layer of each face, 0 furthest from the camera.
+    """
+    signs = np.sign(np.round(view, 9)).astype(int)
+    indices = np.stack(np.unravel_index(voxel_index, shape), axis=-1)
+    # shifted so that the voxel furthest from the camera is in layer 0
+    layers = indices @ signs - np.minimum(signs, 0) @ (np.array(shape) - 1)
+    return 2 * layers + (normals @ view > 1e-9)
+
+
+def faces_to_vmobjects(
+    corners,
+    alphas,
+    color1=BLUE,
+    color2=RED,
+    num_color_levels=64,
+    fill_opacity=0.5,
+    stroke_width=0,
+    stroke_color=BLACK,
+    palette=None,
+    vmobject_class=None,
+    layers=None,
+):
+    """
+    Merges polygon faces into VMobjects, one per layer and colour level; every face becomes a closed subpath of its VMobject.
+    The layers are drawn back to front, so faces of one layer must not overlap on screen (see voxel_layers).
+    Parameters:
+        - corners (numpy.ndarray): (n_faces, n_corners, 3) corners of each face, in drawing order (back to front).
+        - alphas (numpy.ndarray): (n_faces,) colour position of each face between color1 (0) and color2 (1).
+        - num_color_levels (int, optional): The number of distinct colours; fewer levels make fewer VMobjects.
+        - palette (numpy.ndarray, optional): (num_color_levels, 3) rgb colours used instead of the color1 -> color2 ramp.
+        - vmobject_class (type, optional): VMobject or OpenGLVMobject. Default is the VMobject of this module.
+        - layers (numpy.ndarray, optional): (n_faces,) painter's order layer of each face. Default: every run of consecutive
+          faces sharing a colour level is a layer, which keeps the order of the faces exactly but merges few of them.
+    """
+    vmobject_class = vmobject_class or VMobject
+    levels = np.rint(np.clip(alphas, 0, 1) * (num_color_levels - 1)).astype(int)
+    level_colors = interpolate_colors(color1, color2, np.linspace(0, 1, num_color_levels)) if palette is None else palette
+
+    # straight edges expressed as bezier curves; cairo vmobjects are cubic (4 points), opengl ones quadratic (3 points)
+    template = vmobject_class()
+    points_per_curve = getattr(template, "n_points_per_cubic_curve", None) or template.n_points_per_curve
+    t = np.linspace(0, 1, points_per_curve)[:, None]
+    starts, ends = corners, np.roll(corners, -1, axis=1)
+    curves = starts[:, :, None, :] + t * (ends - starts)[:, :, None, :]
+
+    if layers is None:
+        layers = np.concatenate([[0], np.cumsum(np.diff(levels) != 0)])
+    # group the faces by (layer, level), layers back to front; the order within a group doesn't matter
+    order = np.lexsort((levels, layers))
+    curves, levels, layers = curves[order], levels[order], np.asarray(layers)[order]
+    group_starts = np.concatenate([[0], np.flatnonzero((np.diff(levels) != 0) | (np.diff(layers) != 0)) + 1])
+    group_ends = np.append(group_starts[1:], len(levels))
+    vmobjects = []
+    for start, end in zip(group_starts, group_ends):
+        vmobject = vmobject_class(
+            fill_color=rgb_to_color(level_colors[levels[start]]),
+            fill_opacity=fill_opacity,
+            stroke_width=stroke_width,
+            stroke_color=stroke_color,
+        )
+        vmobject.set_points(curves[start:end].reshape(-1, 3))
+        vmobjects.append(vmobject)
+    return vmobjects
+
+
 class Matrix3DNative(Mobject):
-    def __init__(self, tensor: tensor, use_opengl_renderer: bool = False, *args, **kwargs):
+    def __init__(
+        self,
+        tensor: tensor,
+        use_opengl_renderer: bool = False,
+        true_shape: tuple = None,
+        num_color_levels: int = 64,
+        value_range: tuple = None,
+        *args,
+        **kwargs,
+    ):
+        """value_range: the (min, max) mapped onto the BLUE -> RED ramp, e.g. from utils.stats.color_ranges; None: the range of each batch"""
         super().__init__(*args, **kwargs)
         assert tensor.dim() == 4, f"The tensor must be 4-dimensional (batch, c, h, w) got {tensor.dim()}"
         self.cube_side_length = 0.1
         self.spacing = 0.12
         self.tensor = tensor
+        # the labelled shape; differs from tensor.shape once the tensor is pooled
+        self.true_shape = tensor.shape if true_shape is None else Size(true_shape)
+        self.num_color_levels = num_color_levels
+        self.value_range = value_range
         global VGroup, VMobject
         if use_opengl_renderer:
             from manim.mobject.opengl.opengl_vectorized_mobject import OpenGLVGroup as VGroup, OpenGLVMobject as VMobject
         self.make_matrix()
 
     def make_matrix(self):
+        # -------- geometry is shared by every batch; the faces seen from the camera and their painter's order layers --------
+        view = np.array([-np.sin(VIEW_ANGLE), 0, np.cos(VIEW_ANGLE)])  # towards the camera, before the stack is rotated
+        shape = self.tensor.shape[1:]
+        corners, normals, voxel_index = voxel_faces(np.ones(shape, dtype=bool), self.spacing, self.cube_side_length, view)
+        layers = voxel_layers(voxel_index, normals, shape, view)
+
         batch_groups = VGroup()
-        for batch_idx in range(tensor.shape[0]):
-            cube_batch_group = VGroup()
-            for i in range(tensor.shape[1]):
-                for j in range(tensor.shape[2]):
-                    for k in range(tensor.shape[3]):
-                        value = tensor[batch_idx, i, j, k].item()
-                        cube_color = interpolate_color(BLUE, RED, value)
-                        cube = Cube(
-                            side_length=self.cube_side_length,
-                            fill_opacity=0.5,
-                            fill_color=cube_color,
-                        )
-                        cube.shift(np.array([i * self.spacing, j * self.spacing, k * self.spacing]))
-                        cube_batch_group.add(cube)
+        for batch_idx in range(self.tensor.shape[0]):
+            values = normalize(self.tensor[batch_idx].flatten().numpy(), self.value_range)
+            cube_batch_group = VGroup(
+                *faces_to_vmobjects(corners, values[voxel_index], num_color_levels=self.num_color_levels, layers=layers)
+            )
 
             # Adding shape label below each cube batch
             shape_label = (
-                Text(f"{tensor.shape[1:]}", font_size=8)
+                Text(f"{self.true_shape[1:]}", font_size=8)
                 .rotate(30 * DEGREES, axis=[0, 1, 0])
                 .set_width(cube_batch_group.get_width())
                 .next_to(cube_batch_group, direction=DOWN, buff=0.1)
@@ -55,7 +205,7 @@ class Matrix3DNative(Mobject):
             # Create a group containing both the cube batch and the label
             batch_group_with_label = VGroup(cube_batch_group, shape_label)
             # The space + x is a buffer between batches, adjust as needed
-            batch_group_with_label.shift(UP * batch_idx * (tensor.shape[1] * self.spacing + 0.2))
+            batch_group_with_label.shift(UP * batch_idx * (self.tensor.shape[1] * self.spacing + 0.2))
             batch_groups.add(batch_group_with_label)
-        batch_groups.rotate(-30 * DEGREES, axis=[0, 1, 0])
+        batch_groups.rotate(VIEW_ANGLE, axis=[0, 1, 0])
         self.add(batch_groups)
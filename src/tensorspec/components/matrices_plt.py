@@ -1,87 +1,366 @@
 """
 Script making the stack of 3D cubes at the tensor -> 3D matrix section using matplotlib to generate the svg and use those as mobjects. This is much faster than using manim native cubes.
+Rendered svgs are kept in a content-addressed cache, so channels whose data and style did not change are never plotted twice.
+Channels that are missing from the cache can be plotted by a pool of worker processes.
+With in_memory=True the svgs never touch the filesystem: they are serialized into a buffer and parsed from there.
+Large batches can be rasterized to transparent pngs instead (ImageMobject), which are far cheaper to draw than thousands of svg paths.
 """
 
-from manim import SVGMobject, VGroup, VMobject, Text, DOWN, Mobject
+from manim import SVGMobject, ImageMobject, Group, VGroup, VMobject, Text, DOWN, RIGHT, Mobject, config
+import matplotlib
 import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree as ET
 from uuid import uuid4
 from pathlib import Path
+from PIL import Image
+import svgelements as se
 import numpy as np
-import os
-from torch import tensor
+import hashlib
+import io
+from torch import tensor, Size
+from src.tensorspec.utils.cache import DiskCache, content_key
+from src.tensorspec.utils.stats import normalize
+from src.tensorspec.utils import profiling
 
+RASTER_THRESHOLD = 2048  # with output="auto", batches with more voxels than this are rasterized
 
-def plot_channel(batch, idx, save_path, alpha=0.5):
+
+@profiling.profiled("matplotlib.plot_channel")
+def render_channel(batch, target, alpha=0.5, cmap="seismic", elev=20, azim=-30, fmt="svg", dpi=None, vmin=None, vmax=None):
     """
-    Plots a 3D representation of data from a batch using voxels and saves it as an SVG.
-    Note: using a tensor with channel size less than 3 is recommanded.
+    Renders a 3D voxel representation of a (c, h, w) array as an SVG (or a transparent PNG).
     Parameters:
-        - batch (numpy.ndarray): A 3D numpy array representing the data to be plotted.
-        - idx (int): An identifier to label the saved plot (e.g., plot number or iteration).
-        - save_path (Path or str): The directory where the SVG plot should be saved.
+        - batch (numpy.ndarray or torch.Tensor): A 3D array representing the data to be plotted.
+        - target (Path, str or file-like): Where the SVG is written to.
         - alpha (float, optional): The opacity of the voxel colors. Default is 0.5.
-
-    Description:
-        The function visualizes the data in a 3D space, color-mapping the values to the seismic colormap.
-        The function saves the 3D voxel representation in a dark theme as an SVG to the specified path.
+        - cmap (str, optional): The matplotlib colormap the values are mapped to. Default is "seismic".
+        - elev, azim (float, optional): The view angle of the 3D axes. Default is 20 and -30.
+        - fmt (str, optional): "svg" or "png". Default is "svg".
+        - dpi (int, optional): The resolution of a png. Default is the figure dpi.
+        - vmin, vmax (float, optional): The values mapped to both ends of the colormap, e.g. shared by a whole sequence (see utils.stats).
+          Default is the min / max of the batch.
     """
     plt.style.use("dark_background")
     fig = plt.figure()
 
-    batch = batch.numpy()
-    max_val = np.max(batch)
-    min_val = np.min(batch)
+    batch = np.asarray(batch)
     axes = list(batch.shape)
     traj = np.random.choice([-1, 1], axes)
-    normalized_values = (batch - min_val) / (max_val - min_val)
+    normalized_values = normalize(batch, None if vmin is None else (vmin, vmax))
 
     colors = np.empty(axes + [4], dtype=np.float32)
-    colors[..., :3] = plt.cm.seismic(normalized_values)[..., :3]
+    colors[..., :3] = plt.get_cmap(cmap)(normalized_values)[..., :3]
     colors[..., 3] = alpha
 
     ax = fig.add_subplot(111, projection="3d")
     ax.voxels(traj, facecolors=colors, edgecolors="black", linewidth=0.1)
     ax.set_box_aspect([np.ptp(arr) for arr in [range(axes[0]), range(axes[1]), range(axes[2])]])
-    ax.view_init(elev=20, azim=-30)
+    ax.view_init(elev=elev, azim=azim)
     ax.set_axis_off()
 
     plt.tight_layout()
     fig.patch.set_alpha(0.0)
     ax.patch.set_alpha(0.0)
-    fig.savefig(save_path / f"3d_plot_{idx}.svg", format="svg", transparent=True, bbox_inches=0, pad_inches=0)
+    fig.savefig(target, format=fmt, dpi=dpi or "figure", transparent=True, bbox_inches=0, pad_inches=0)
     plt.close(fig)
 
 
+def plot_channel(batch, idx, save_path, alpha=0.5, **style):
+    """
+    Plots a 3D representation of data from a batch using voxels and saves it as an SVG.
+    Note: using a tensor with channel size less than 3 is recommanded.
+    Parameters:
+        - batch (numpy.ndarray): A 3D numpy array representing the data to be plotted.
+        - idx (int): An identifier to label the saved plot (e.g., plot number or iteration).
+        - save_path (Path or str): The directory where the SVG plot should be saved.
+        - alpha (float, optional): The opacity of the voxel colors. Default is 0.5.
+        - **style: cmap / elev / azim, passed on to render_channel.
+
+    Description:
+        The function visualizes the data in a 3D space, color-mapping the values to the seismic colormap.
+        The function saves the 3D voxel representation in a dark theme as an SVG to the specified path.
+    """
+    render_channel(batch, Path(save_path) / f"3d_plot_{idx}.svg", alpha=alpha, **style)
+
+
+def channel_key(batch, **style):
+    """The cache key of a channel plot: the data, the plot style and the matplotlib version that draws it; ends with the file extension."""
+    return f"{content_key(np.asarray(batch), matplotlib=matplotlib.__version__, **style)}.{style.get('fmt', 'svg')}"
+
+
+def raster_dpi(num_batches, height_ratio=0.8):
+    """The dpi at which one of num_batches plots stacked into height_ratio of the frame maps about 1:1 onto the scene's pixels."""
+    pixels = config.pixel_height * height_ratio / num_batches
+    return int(np.clip(pixels / plt.rcParams["figure.figsize"][1], 50, 600))
+
+
+def channel_style(tensor, style, output="auto", raster_threshold=RASTER_THRESHOLD, value_range=None, dpi=None):
+    """
+    Adds the output format (and the colour range) to a plot style for the batches of a (batch, c, h, w) tensor.
+    output: "vector" (svg), "raster" (png at raster_dpi) or "auto" (raster when a batch has more than raster_threshold voxels)
+    value_range: the (vmin, vmax) of the colormap; None normalises every batch by its own min / max
+    dpi: the resolution of raster plots; None: raster_dpi of the tensor's batch count
+    """
+    assert output in ["auto", "vector", "raster"], f"output must be 'auto', 'vector' or 'raster', got {output}"
+    if value_range is not None:
+        style = {**style, "vmin": float(value_range[0]), "vmax": float(value_range[1])}
+    if output == "vector" or (output == "auto" and np.prod(tensor.shape[1:]) <= raster_threshold):
+        return {**style, "fmt": "svg"}
+    return {**style, "fmt": "png", "dpi": dpi or raster_dpi(tensor.shape[0])}
+
+
+def sequence_output(tensors, output="auto", raster_threshold=RASTER_THRESHOLD):
+    """
+    The (output, dpi) shared by the matrices of a sequence of (batch, c, h, w) tensors. Consecutive matrices are transformed
+    into each other, and an svg can't be interpolated with a png, nor two pngs of different sizes: "auto" is resolved once,
+    to "raster" as soon as one tensor has more than raster_threshold voxels per batch, at the dpi of the most batches.
+    """
+    assert output in ["auto", "vector", "raster"], f"output must be 'auto', 'vector' or 'raster', got {output}"
+    if output == "auto":
+        output = "raster" if max(np.prod(tensor.shape[1:]) for tensor in tensors) > raster_threshold else "vector"
+    return output, raster_dpi(max(tensor.shape[0] for tensor in tensors)) if output == "raster" else None
+
+
+def make_channel_mobject(source, fmt):
+    """Turns a rendered plot (a path or the data itself) into a mobject: SVGMobject for svgs, ImageMobject for pngs."""
+    with profiling.timed(f"matplotlib.load_{fmt}"):
+        if fmt == "png":
+            image = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+            return ImageMobject(np.array(image.convert("RGBA")))
+        return SVGBufferMobject(source) if isinstance(source, bytes) else SVGMobject(source)
+
+
+class SVGBufferMobject(SVGMobject):
+    """
+    An SVGMobject parsed from svg data held in memory instead of from a file.
+    SVGMobject writes a modified copy next to the file it reads; here the modified tree is parsed from a buffer as well.
+    """
+
+    def __init__(self, svg_data: bytes, **kwargs):
+        self.svg_data = svg_data
+        super().__init__(file_name=None, **kwargs)
+
+    @property
+    def hash_seed(self):
+        return (*super().hash_seed, hashlib.sha1(self.svg_data).hexdigest())
+
+    def generate_mobject(self):
+        new_tree = self.modify_xml_tree(ET.ElementTree(ET.fromstring(self.svg_data)))
+        buffer = io.BytesIO()
+        new_tree.write(buffer)
+        buffer.seek(0)
+
+        mobjects = self.get_mobjects_from(se.SVG.parse(buffer))
+        if isinstance(mobjects, tuple):  # newer manim versions also return the id -> vgroup dict
+            mobjects, self.id_to_vgroup_dict = mobjects
+        self.add(*mobjects)
+        self.flip(RIGHT)  # Flip y
+        return self
+
+
+def render_channel_to_bytes(batch, style):
+    buffer = io.BytesIO()
+    render_channel(batch, buffer, **style)
+    return buffer.getvalue()
+
+
+def _init_worker():
+    matplotlib.use("Agg")
+    # stable element ids, so a plot does not depend on the worker that drew it
+    matplotlib.rcParams["svg.hashsalt"] = "tensorspec"
+
+
+def _render_into_cache(cache, key, batch, style):
+    cache.put(key, lambda path: render_channel(batch, path, **style))
+
+
+def render_channels(jobs, cache, workers=None):
+    """
+    Makes sure every batch is plotted into the cache; missing plots are fanned out over a process pool.
+    Parameters:
+        - jobs (list): (batch, style) pairs; the (c, h, w) arrays to plot, e.g. all batches of all tensors of a scene,
+          and the keyword arguments of render_channel for each of them.
+        - cache (DiskCache): The cache the plots are written to.
+        - workers (int, optional): The number of worker processes; None uses one per cpu, 1 plots in this process.
+    Returns:
+        - list[Path]: The cached plot of every batch, in the order of the input.
+    """
+    jobs = [(np.asarray(batch), style) for batch, style in jobs]
+    keys = [channel_key(batch, **style) for batch, style in jobs]
+    missing = {key: job for key, job in zip(keys, jobs) if cache.get(key) is None}
+
+    if workers == 1 or len(missing) <= 1:
+        for key, (batch, style) in missing.items():
+            _render_into_cache(cache, key, batch, style)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            futures = [executor.submit(_render_into_cache, cache, key, batch, style) for key, (batch, style) in missing.items()]
+            [future.result() for future in futures]  # re-raise errors from the workers
+
+    return [cache.path(key) for key in keys]
+
+
+def render_channels_in_memory(batches, workers=None, **style):
+    """Same as render_channels (with one style) but returns the plot data of every batch, in input order, without touching the filesystem."""
+    batches = [np.asarray(batch) for batch in batches]
+    if workers == 1 or len(batches) <= 1:
+        return [render_channel_to_bytes(batch, style) for batch in batches]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        return list(executor.map(render_channel_to_bytes, batches, [style] * len(batches)))
+
+
 class Matrix3DMatplotlib(Mobject):
-    def __init__(self, tensor: tensor, use_opengl_renderer: bool = False, *args, **kwargs):
+    style = {"alpha": 0.5, "cmap": "seismic", "elev": 20, "azim": -30}
+
+    def __init__(
+        self,
+        tensor: tensor,
+        use_opengl_renderer: bool = False,
+        true_shape: tuple = None,
+        cache_dir=Path("media", "image_cache"),
+        max_cache_bytes: int = 512 * 2**20,
+        workers: int = 1,
+        in_memory: bool = False,
+        output: str = "auto",
+        raster_threshold: int = RASTER_THRESHOLD,
+        value_range: tuple = None,
+        dpi: int = None,
+        *args,
+        **kwargs,
+    ):
+        """
+        true_shape: the shape shown in the labels when the tensor is a pooled stand-in for a larger one
+        cache_dir: where rendered svgs are kept between scenes and runs; None renders every channel to a throwaway file
+        max_cache_bytes: the least recently used svgs are evicted once the cache grows past this size
+        workers: number of processes plotting the channels (None: one per cpu); needs the cache unless in_memory
+        in_memory: plot into memory buffers and parse them directly; no file is read or written and the cache is not used
+        output: "vector" (svg paths), "raster" (png as an ImageMobject) or "auto" (raster above raster_threshold voxels per batch)
+        value_range: the (min, max) mapped onto the colormap, e.g. from utils.stats.color_ranges; None: the range of each batch
+        dpi: the resolution of raster plots, e.g. from sequence_output; None: raster_dpi of the batch count
+        """
         super().__init__(*args, **kwargs)
         assert tensor.dim() == 4, f"The tensor must be 4-dimensional (batch, c, h, w) got {tensor.dim()}"
+        assert workers == 1 or in_memory or cache_dir is not None, "parallel rendering writes into the cache; set cache_dir"
         self.tensor = tensor
+        # the labelled shape; differs from tensor.shape once the tensor is pooled
+        self.true_shape = tensor.shape if true_shape is None else Size(true_shape)
         self.distance = 0.1
+        self.workers = workers
+        self.in_memory = in_memory
+        self.output, self.raster_threshold = output, raster_threshold
+        self.value_range = value_range
+        self.dpi = dpi
+        self.cache = None if cache_dir is None or in_memory else DiskCache(cache_dir, max_cache_bytes, prefix="3d_plot_")
         global VGroup, VMobject
         if use_opengl_renderer:
             from manim.mobject.opengl.opengl_vectorized_mobject import OpenGLVGroup as VGroup, OpenGLVMobject as VMobject
         self.make_matrix()
 
-    def make_matrix(self):
-        save_path = Path("media", "image_cache")
-        save_path.mkdir(parents=True, exist_ok=True)
-        [os.remove(file) for file in save_path.glob("*")]
+    def make_plot(self, batch, style):
+        if self.cache is None:
+            save_path = Path("media", "image_cache")
+            save_path.mkdir(parents=True, exist_ok=True)
+            plot_path = save_path / f"3d_plot_{uuid4().hex}.{style['fmt']}"
+            render_channel(batch, plot_path, **style)
+            plot_object = make_channel_mobject(plot_path, style["fmt"])
+            plot_path.unlink()
+            return plot_object
+
+        key = channel_key(batch, **style)
+        plot_path = self.cache.get(key)
+        profiling.count("matplotlib.cache_miss" if plot_path is None else "matplotlib.cache_hit")
+        plot_path = plot_path or self.cache.put(key, lambda path: render_channel(batch, path, **style))
+        return make_channel_mobject(plot_path, style["fmt"])
 
-        num_channels = self.tensor.shape[0]
-        hexes = [str(uuid4().hex) for _ in range(num_channels)]
+    @classmethod
+    def prerender(
+        cls,
+        tensors,
+        workers=None,
+        cache_dir=Path("media", "image_cache"),
+        max_cache_bytes=512 * 2**20,
+        output="auto",
+        raster_threshold=RASTER_THRESHOLD,
+        value_ranges=None,
+        dpi=None,
+    ):
+        """
+        Plots all batches of all tensors into the cache at once, so that constructing their matrices afterwards only hits the cache.
+        value_ranges: the value_range of each tensor's matrix
+        """
+        cache = DiskCache(cache_dir, max_cache_bytes, prefix="3d_plot_")
+        jobs = []
+        for tensor, value_range in zip(tensors, value_ranges or [None] * len(tensors)):
+            style = channel_style(tensor, cls.style, output, raster_threshold, value_range, dpi)
+            jobs += [(tensor[i].numpy(), style) for i in range(tensor.shape[0])]
+        render_channels(jobs, cache, workers)
 
-        for i in range(num_channels):
-            plot_channel(self.tensor[i], hexes[i], save_path=save_path)
+    def render_plots(self, cached=True):
+        """
+        The plot of every batch of self.tensor as a mobject (through the cache, the workers or memory) and the plot style.
+        cached=False plots into memory and leaves the cache alone, for plots that are shown once (see update_tensor).
+        """
+        batches = [self.tensor[i].numpy() for i in range(self.tensor.shape[0])]
+        style = channel_style(self.tensor, self.style, self.output, self.raster_threshold, self.value_range, self.dpi)
+        if self.in_memory or not cached:
+            plot_data = render_channels_in_memory(batches, self.workers, **style)
+            plot_objects = [make_channel_mobject(data, style["fmt"]) for data in plot_data]
+        else:
+            if self.workers != 1:
+                with profiling.timed("matplotlib.render_channels", workers=self.workers):
+                    render_channels([(batch, style) for batch in batches], self.cache, self.workers)
+            plot_objects = [self.make_plot(batch, style) for batch in batches]
+        if self.cache is not None and cached:
+            self.cache.evict()
+        return plot_objects, style
+
+    def update_tensor(self, tensor, value_range=None):
+        """
+        Shows new values of the same shape without rebuilding the matrix: the batches are plotted again (in memory) and
+        the colours are copied into the existing plots, the rgb pixels of raster plots and the fill / stroke colours of
+        the faces of vector plots; their opacity (and any fading) is kept.
+        Unlike the buffer copies of FlatMatrix3D, every call re-renders all batches with matplotlib, which costs what
+        make_matrix costs without a cache hit; nothing is replaced in the scene. The plots of animation frames are seen once,
+        so they bypass the cache instead of evicting the plots of the matrices.
+        A vector plot whose faces changed in number is replaced with become(), which resets its opacity.
+        Parameters:
+            - tensor (torch.Tensor): The new (batch, c, h, w) values; same shape as the current tensor.
+            - value_range (tuple, optional): Replaces the (min, max) of the colormap; kept for later updates.
+        """
+        assert (
+            tensor.shape == self.tensor.shape
+        ), f"update_tensor needs the shape {tuple(self.tensor.shape)}, got {tuple(tensor.shape)}"
+        self.tensor = tensor
+        self.value_range = self.value_range if value_range is None else value_range
+        plot_objects, style = self.render_plots(cached=False)
+        for plot, new_plot in zip(self.plots, plot_objects):
+            if style["fmt"] == "png":
+                # same figure size and dpi, same pixels; the alpha channel only depends on the voxel layout
+                plot.pixel_array[..., :3] = new_plot.pixel_array[..., :3]
+                continue
+            faces, new_faces = plot.family_members_with_points(), new_plot.family_members_with_points()
+            if len(faces) == len(new_faces):
+                for face, new_face in zip(faces, new_faces):
+                    face.set_fill(new_face.get_fill_color(), family=False)
+                    face.set_stroke(new_face.get_stroke_color(), family=False)
+            else:  # matplotlib culled a different set of faces
+                plot.become(new_plot.replace(plot, stretch=True))
+        return self
+
+    @profiling.profiled("Matrix3DMatplotlib.make_matrix")
+    def make_matrix(self):
+        plot_objects, style = self.render_plots()
+        self.plots = plot_objects
 
-        svg_objects = [SVGMobject(save_path / f"3d_plot_{hex}.svg") for hex in hexes]
-        vgroup = VGroup()
+        # ImageMobjects can't live in a VGroup
+        vgroup = VGroup() if style["fmt"] == "svg" else Group()
         previous_object = None
 
-        for i, obj in enumerate(svg_objects):
-            shape_label = Text(f"{self.tensor[i].shape}").scale_to_fit_width(obj.get_width())
+        for i, obj in enumerate(plot_objects):
+            shape_label = Text(f"{self.true_shape[1:]}").scale_to_fit_width(obj.get_width())
             shape_label = shape_label.next_to(obj, direction=DOWN, buff=0.1)
-            batch_group = VGroup(obj, shape_label)
+            batch_group = VGroup(obj, shape_label) if style["fmt"] == "svg" else Group(obj, shape_label)
             if previous_object:
                 batch_group.next_to(previous_object, direction=DOWN, buff=self.distance)
             vgroup.add(batch_group)
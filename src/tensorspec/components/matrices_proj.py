@@ -0,0 +1,105 @@
+"""
+Script making the stack of 3D cubes at the tensor -> 3D matrix section by projecting the voxels with numpy.
+Looks like the matplotlib engine (same view angle and colormap) but skips ax.voxels: the visible faces are projected onto the screen,
+depth sorted with one argsort and emitted directly as merged polygons, one VMobject per diagonal layer of voxels and colour level.
+"""
+
+from manim import VGroup, VMobject, Text, DOWN, Mobject
+import matplotlib.pyplot as plt
+import numpy as np
+from torch import tensor, Size
+from src.tensorspec.components.matrices import voxel_faces, voxel_layers, faces_to_vmobjects
+from src.tensorspec.utils.stats import normalize
+
+
+def project_voxels(shape, elev=20, azim=-30, spacing=0.1, cull_backfaces=False):
+    """
+    Projects the exposed faces of a (c, h, w) voxel grid for a matplotlib style view_init(elev, azim) camera (orthographic).
+    Parameters:
+        - shape (tuple): The (c, h, w) shape of the grid; axes are mapped to x, y and z like ax.voxels does.
+        - elev, azim (float, optional): The view angle in degrees. Default is 20 and -30.
+        - spacing (float, optional): The side length of one voxel on screen. Default is 0.1.
+        - cull_backfaces (bool, optional): Drop faces pointing away from the camera; only invisible with opaque voxels. Default is False.
+    Returns:
+        - polygons (numpy.ndarray): (n_faces, 4, 3) screen coordinates (z = 0) of each face, ordered back to front.
+        - voxel_index (numpy.ndarray): (n_faces,) flat index of the voxel each face belongs to.
+        - layers (numpy.ndarray): (n_faces,) painter's order layer of each face (voxel_layers).
+    """
+    elev, azim = np.radians(elev), np.radians(azim)
+    eye = np.array([np.cos(elev) * np.cos(azim), np.cos(elev) * np.sin(azim), np.sin(elev)])
+    right = np.array([-np.sin(azim), np.cos(azim), 0])
+    up = np.cross(eye, right)
+
+    corners, normals, voxel_index = voxel_faces(np.ones(shape, dtype=bool), spacing, spacing, eye if cull_backfaces else None)
+
+    # painter's algorithm: the faces furthest from the camera are drawn first
+    order = np.argsort(corners.mean(axis=1) @ eye, kind="stable")
+    corners, normals, voxel_index = corners[order], normals[order], voxel_index[order]
+
+    polygons = np.zeros_like(corners)
+    polygons[..., 0] = corners @ right
+    polygons[..., 1] = corners @ up
+    return polygons, voxel_index, voxel_layers(voxel_index, normals, shape, eye)
+
+
+class Matrix3DProjected(Mobject):
+    def __init__(
+        self,
+        tensor: tensor,
+        use_opengl_renderer: bool = False,
+        true_shape: tuple = None,
+        num_color_levels: int = 64,
+        cull_backfaces: bool = False,
+        value_range: tuple = None,
+        *args,
+        **kwargs,
+    ):
+        """value_range: the (min, max) mapped onto the colormap, e.g. from utils.stats.color_ranges; None: the range of each batch"""
+        super().__init__(*args, **kwargs)
+        assert tensor.dim() == 4, f"The tensor must be 4-dimensional (batch, c, h, w) got {tensor.dim()}"
+        self.tensor = tensor
+        # the labelled shape; differs from tensor.shape once the tensor is pooled
+        self.true_shape = tensor.shape if true_shape is None else Size(true_shape)
+        self.distance = 0.1
+        self.num_color_levels = num_color_levels
+        self.cull_backfaces = cull_backfaces
+        self.value_range = value_range
+        self.style = {"alpha": 0.5, "cmap": "seismic", "elev": 20, "azim": -30}
+        global VGroup, VMobject
+        if use_opengl_renderer:
+            from manim.mobject.opengl.opengl_vectorized_mobject import OpenGLVGroup as VGroup, OpenGLVMobject as VMobject
+        self.make_matrix()
+
+    def make_matrix(self):
+        # -------- the projection only depends on the shape; shared by every batch --------
+        polygons, voxel_index, layers = project_voxels(
+            self.tensor.shape[1:], self.style["elev"], self.style["azim"], cull_backfaces=self.cull_backfaces
+        )
+        palette = plt.get_cmap(self.style["cmap"])(np.linspace(0, 1, self.num_color_levels))[:, :3]
+
+        vgroup = VGroup()
+        previous_object = None
+
+        for i in range(self.tensor.shape[0]):
+            normalized_values = normalize(self.tensor[i].flatten().numpy(), self.value_range)
+            obj = VGroup(
+                *faces_to_vmobjects(
+                    polygons,
+                    normalized_values[voxel_index],
+                    num_color_levels=self.num_color_levels,
+                    fill_opacity=self.style["alpha"],
+                    stroke_width=0.2,
+                    palette=palette,
+                    vmobject_class=VMobject,
+                    layers=layers,
+                )
+            )
+
+            shape_label = Text(f"{self.true_shape[1:]}").scale_to_fit_width(obj.get_width())
+            shape_label = shape_label.next_to(obj, direction=DOWN, buff=0.1)
+            batch_group = VGroup(obj, shape_label)
+            if previous_object:
+                batch_group.next_to(previous_object, direction=DOWN, buff=self.distance)
+            vgroup.add(batch_group)
+            previous_object = batch_group
+        self.add(vgroup)
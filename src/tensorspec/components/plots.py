@@ -2,46 +2,180 @@
 Script for making the bar plot showing the distribution of tensor values at the tensor -> distribution section
 """
 
-from manim import BarChart, DOWN, Group, Text, UP, VMobject, RIGHT, LEFT
+from manim import BarChart, DOWN, Group, Text, UP, VMobject, RIGHT, LEFT, ValueTracker
 import numpy as np
-from scipy.stats import gaussian_kde
+from src.tensorspec.utils.stats import sequence_stats
+from src.tensorspec.utils import profiling
 
+RANGE_MODES = ["unit", "data", "robust"]
 
-def create_distribution_plot(tensor, num_bins=100, font_size=24, width=6, height=4, bw_method=0.1, use_opengl_renderer=False):
+
+def histogram_layout(tensors, range_mode="data", shared=True, percentiles=(1, 99), num_bins="auto", min_bins=10, max_bins=100):
+    """
+    The value range and bin count of the distribution plot of each tensor in a sequence, from its statistics pass.
+    Parameters:
+        - tensors (list): The tensors of the sequence, or their TensorStats.
+        - range_mode (str, optional): "unit" ([0, 1]), "data" (min / max) or "robust" (the given percentiles). Default is "data".
+        - shared (bool, optional): Use one range (and bin count) spanning the whole sequence. Default is True.
+        - percentiles (tuple, optional): The lower and upper percentile of the "robust" range. Default is (1, 99).
+        - num_bins (int or "auto", optional): A fixed bin count, or the Freedman-Diaconis rule clipped to [min_bins, max_bins].
+    Returns:
+        - list[tuple]: ((min, max), num_bins) for every tensor.
+    """
+    assert range_mode in RANGE_MODES, f"range_mode must be one of {RANGE_MODES}, got {range_mode}"
+
+    # the statistics hold every order statistic needed: the range and the interquartile range
+    tensor_stats = sequence_stats(tensors, percentiles)
+    stats = np.array([s.quantiles for s in tensor_stats])
+    counts = np.array([s.count for s in tensor_stats])
+    if shared:
+        # exact for the extremes; the percentiles of the sequence are approximated by the widest per tensor ones
+        stats = np.concatenate([stats[:, :3].min(axis=0), stats[:, 3:].max(axis=0)])[None]
+        counts = np.array([counts.sum()])
+
+    layouts = []
+    for (low, robust_low, q1, q3, robust_high, high), count in zip(stats, counts):
+        match range_mode:
+            case "unit":
+                value_range = (0.0, 1.0)
+            case "data":
+                value_range = (float(low), float(high))
+            case "robust":
+                value_range = (float(robust_low), float(robust_high))
+        if value_range[1] <= value_range[0]:  # constant data
+            value_range = (value_range[0] - 0.5, value_range[0] + 0.5)
+
+        bins = num_bins
+        if num_bins == "auto":
+            bin_width = 2 * (q3 - q1) / np.cbrt(count)
+            bins = (value_range[1] - value_range[0]) / bin_width if bin_width > 0 else max_bins
+            bins = int(np.clip(np.ceil(bins), min_bins, max_bins))
+        layouts.append((value_range, bins))
+
+    return layouts * len(tensors) if shared else layouts
+
+
+def binned_kde(values, value_range, grid_size=1024, bw_method=0.1):
+    """
+    Gaussian kernel density estimate on a regular grid, computed from a histogram of the values (binned KDE).
+    The histogram is convolved with the kernel through an FFT, so the cost is O(N + G log G) instead of O(N * G) for an exact KDE.
+    Parameters:
+        - values (numpy.ndarray): The samples.
+        - value_range (tuple): The (min, max) the density is evaluated over.
+        - grid_size (int, optional): The number of grid points. Default is 1024.
+        - bw_method (float, optional): The bandwidth as a factor of the standard deviation, like scipy's gaussian_kde. Default is 0.1.
+    Returns:
+        - grid (numpy.ndarray): (grid_size,) evaluation points.
+        - density (numpy.ndarray): (grid_size,) estimated density at each point.
+    """
+    counts, _ = np.histogram(values, bins=grid_size, range=value_range)
+    std = np.std(values, ddof=1) if values.size > 1 else 0
+    return histogram_kde(counts, value_range, std, bw_method)
+
+
+def histogram_kde(counts, value_range, std, bw_method=0.1):
+    """
+    binned_kde from precomputed histogram counts (e.g. TensorStats.histogram) and standard deviation of the samples;
+    the grid has one point per bin.
+    """
+    grid_size = len(counts)
+    edges = np.linspace(value_range[0], value_range[1], grid_size + 1)
+    grid = (edges[:-1] + edges[1:]) / 2
+    delta = edges[1] - edges[0]
+    sigma = max(bw_method * std, delta)  # constant data: fall back to the grid resolution
+
+    # the kernel covers every offset between two grid points; zero padding turns the circular FFT product into a linear convolution
+    kernel = np.exp(-0.5 * (np.arange(-grid_size + 1, grid_size) * delta / sigma) ** 2)
+    size = 2 ** int(np.ceil(np.log2(len(counts) + len(kernel) - 1)))
+    convolved = np.fft.irfft(np.fft.rfft(counts, size) * np.fft.rfft(kernel, size), size)
+    density = convolved[grid_size - 1 : 2 * grid_size - 1] / ((counts.sum() or 1) * sigma * np.sqrt(2 * np.pi))
+    return grid, np.clip(density, 0, None)
+
+
+def chart_points(chart, x, y):
+    """Vectorised chart.coords_to_point for arrays of x and y; the axes are linear, so three anchor points define the mapping."""
+    origin = np.array(chart.coords_to_point(0, 0))
+    x_unit = np.array(chart.coords_to_point(1, 0)) - origin
+    y_unit = np.array(chart.coords_to_point(0, 1)) - origin
+    return origin + np.outer(x, x_unit) + np.outer(y, y_unit)
+
+
+def fine_bins(num_bins, grid_size=1024):
+    """The smallest multiple of num_bins with at least grid_size bins: the KDE grid whose histogram also sums up to the bars."""
+    return num_bins * int(np.ceil(grid_size / num_bins))
+
+
+def batch_distributions(stats, value_range, num_bins, grid_size=1024, bw_method=0.1):
+    """
+    The bar heights and KDE curve of every batch of a tensor, from a single histogram of its statistics (TensorStats).
+    Returns:
+        - hist_values (numpy.ndarray): (batch, num_bins) histogram counts.
+        - grid (numpy.ndarray): (fine_bins(num_bins, grid_size),) the points the curves are evaluated at.
+        - densities (numpy.ndarray): (batch, len(grid)) KDE of every batch.
+    """
+    counts = stats.histogram(value_range, fine_bins(num_bins, grid_size))
+    hist_values = counts.reshape(len(counts), num_bins, -1).sum(axis=2)
+    densities = [histogram_kde(batch_counts, value_range, std, bw_method) for batch_counts, std in zip(counts, stats.batch_std)]
+    return hist_values, densities[0][0], np.array([density for _, density in densities])
+
+
+def extreme_labels(barchart, extremes=None, font_size=24):
+    """The "Min" / "Max" labels under the left and right corner of a bar chart; extremes is None for an empty chart."""
+    low, high = ("-", "-") if extremes is None else (f"{extremes[0]:.2f}", f"{extremes[1]:.2f}")
+    min_label = (
+        Text(f"Min: {low}", font_size=font_size)
+        .next_to(barchart, direction=DOWN, buff=0.2)
+        .align_to(barchart.get_corner(DOWN + LEFT), LEFT)
+    )
+    max_label = (
+        Text(f"Max: {high}", font_size=font_size)
+        .next_to(barchart, direction=DOWN, buff=0.2)
+        .align_to(barchart.get_corner(DOWN + RIGHT), RIGHT)
+    )
+    return min_label, max_label
+
+
+@profiling.profiled("create_distribution_plot")
+def create_distribution_plot(
+    tensor,
+    num_bins=100,
+    font_size=24,
+    width=6,
+    height=4,
+    bw_method=0.1,
+    use_opengl_renderer=False,
+    value_range=(0, 1),
+    stats=None,
+):
+    """
+    value_range: the (min, max) covered by the bins; see histogram_layout for picking it and num_bins from the data
+    stats: the TensorStats of the tensor when they are already computed
+    """
     global VGroup, VMobject
     if use_opengl_renderer:
         from manim.mobject.opengl.opengl_vectorized_mobject import OpenGLVGroup as VGroup, OpenGLVMobject as VMobject
 
     assert tensor.dim() == 4, f"The tensor must be 4-dimensional with the first dimension being the batch, got {tensor.dim()}"
-    num_batches = tensor.size(0)
+    stats = stats or sequence_stats([tensor])[0]
+    with profiling.timed("distribution.histogram_kde"):
+        batch_hist_values, grid, densities = batch_distributions(stats, value_range, num_bins, bw_method=bw_method)
+    x_kde = (grid - value_range[0]) / (value_range[1] - value_range[0]) * num_bins
     group_list = []
 
-    for i in range(num_batches):
-        values = tensor[i].flatten().numpy()
-        hist_values, bins = np.histogram(values, bins=np.linspace(0, 1, num_bins + 1))
-
+    for i, (hist_values, density) in enumerate(zip(batch_hist_values, densities)):
         # Create the bar chart with different colors for each batch
-        barchart = BarChart(values=hist_values, x_axis_config={"font_size": font_size}, x_length=width, y_length=height)
+        with profiling.timed("distribution.bar_chart", num_bins=num_bins):
+            barchart = BarChart(values=hist_values, x_axis_config={"font_size": font_size}, x_length=width, y_length=height)
 
         # Create the KDE line plot with different colors for each batch
-        kde = gaussian_kde(values, bw_method=bw_method)
-        x_kde = np.linspace(0, num_bins, 1000)
-        y_kde = kde(x_kde / num_bins) * max(hist_values) / max(kde(x_kde / num_bins))  # normalizing
+        y_kde = density * max(hist_values) / (max(density) or 1)  # normalizing
 
-        kde_line_points = [barchart.coords_to_point(x, y) for x, y in zip(x_kde, y_kde)]
+        kde_line_points = chart_points(barchart, x_kde, y_kde)
         kde_line = VMobject()
         kde_line.set_points_as_corners(kde_line_points)
 
-        min_label = (
-            Text(f"Min: {values.min():.2f}", font_size=font_size)
-            .next_to(barchart, direction=DOWN, buff=0.2)
-            .align_to(barchart.get_corner(DOWN + LEFT), LEFT)
-        )
-        max_label = (
-            Text(f"Max: {values.max():.2f}", font_size=font_size)
-            .next_to(barchart, direction=DOWN, buff=0.2)
-            .align_to(barchart.get_corner(DOWN + RIGHT), RIGHT)
-        )
+        with profiling.timed("distribution.labels"):
+            min_label, max_label = extreme_labels(barchart, (stats.batch_min[i], stats.batch_max[i]), font_size)
 
         group = Group(barchart, kde_line, min_label, max_label)
         group.move_to(UP * i * (height + 1))  # Adjust the vertical position based on the batch index
@@ -49,3 +183,123 @@ def create_distribution_plot(tensor, num_bins=100, font_size=24, width=6, height
         group_list.append(group)
 
     return Group(*group_list)
+
+
+class DistributionPlot(Group):
+    """
+    The distribution plots of a whole sequence of tensors in one mobject of fixed topology: num_batches bar charts of num_bins bars.
+    The histograms and KDE curves of every tensor are computed once by add_frame; self.tracker (a ValueTracker) selects the tensor
+    shown and fractional values interpolate the bar heights and curves of the two neighbouring tensors, so a transition is
+    self.play(plot.tracker.animate.set_value(i)) instead of a ReplacementTransform between two freshly built charts.
+    Bar heights are relative to the tallest bar of each batch, like the automatic y range of create_distribution_plot.
+    """
+
+    def __init__(
+        self,
+        num_bins=100,
+        num_batches=1,
+        font_size=24,
+        width=6,
+        height=4,
+        bw_method=0.1,
+        grid_size=1024,
+        use_opengl_renderer=False,
+    ):
+        """
+        Parameters:
+            - num_bins (int, optional): The number of bars of every chart. Default is 100.
+            - num_batches (int, optional): The number of charts; extra batches of a tensor are not shown, missing ones are empty.
+            - grid_size (int, optional): The least number of points of the KDE curves (rounded up by fine_bins). Default is 1024.
+        """
+        super().__init__()
+        global VGroup, VMobject
+        if use_opengl_renderer:
+            from manim.mobject.opengl.opengl_vectorized_mobject import OpenGLVGroup as VGroup, OpenGLVMobject as VMobject
+
+        self.num_bins = num_bins
+        self.num_batches = num_batches
+        self.font_size = font_size
+        self.width = width
+        self.bw_method = bw_method
+        self.grid_size = fine_bins(num_bins, grid_size)
+
+        # -------- per tensor: (num_batches, num_bins) heights, (num_batches, grid_size) curves, [(min, max) or None] --------
+        self.heights, self.curves, self.extremes = [], [], []
+        self.shown_labels = None
+        self.tracker = ValueTracker(0)
+
+        for i in range(num_batches):
+            # full height bars fix the size of the chart; the updater moves them to the heights of the tensor shown
+            barchart = BarChart(
+                values=np.ones(num_bins),
+                y_range=[0, 1, 0.25],
+                x_axis_config={"font_size": font_size},
+                x_length=width,
+                y_length=height,
+            )
+            group = Group(barchart, VMobject(), *extreme_labels(barchart, font_size=font_size))
+            group.move_to(UP * i * (height + 1))  # Adjust the vertical position based on the batch index
+            self.add(group)
+
+        self.add_updater(lambda plot: plot.show_frame(plot.tracker.get_value()))
+
+    def add_frame(self, tensor, value_range=(0, 1), stats=None):
+        """
+        Precomputes the histograms and KDE curves of a (batch, c, h, w) tensor over value_range; returns its frame index.
+        stats: the TensorStats of the tensor when they are already computed
+        """
+        assert tensor.dim() == 4, f"The tensor must be 4-dimensional (batch, c, h, w) got {tensor.dim()}"
+        stats = stats or sequence_stats([tensor])[0]
+        hist_values, _, densities = batch_distributions(stats, value_range, self.num_bins, self.grid_size, self.bw_method)
+        shown = min(len(hist_values), self.num_batches)
+
+        heights = np.zeros((self.num_batches, self.num_bins))
+        curves = np.zeros((self.num_batches, self.grid_size))
+        heights[:shown] = hist_values[:shown] / np.maximum(hist_values[:shown].max(axis=1, keepdims=True), 1)
+        peaks = densities[:shown].max(axis=1, keepdims=True)
+        curves[:shown] = densities[:shown] / np.where(peaks > 0, peaks, 1)
+        extremes = [(stats.batch_min[i], stats.batch_max[i]) for i in range(shown)] + [None] * (self.num_batches - shown)
+
+        self.heights.append(heights)
+        self.curves.append(curves)
+        self.extremes.append(extremes)
+        if len(self.heights) == 1:
+            self.show_frame(self.tracker.get_value())
+        return len(self.heights) - 1
+
+    def show_frame(self, t):
+        """Sets the bars and curves to frame t, interpolated between the two nearest frames; the labels show the nearest one."""
+        if not self.heights:
+            return self
+        t = float(np.clip(t, 0, len(self.heights) - 1))
+        index = int(t)
+        following, alpha = min(index + 1, len(self.heights) - 1), t - index
+        heights = (1 - alpha) * self.heights[index] + alpha * self.heights[following]
+        curves = (1 - alpha) * self.curves[index] + alpha * self.curves[following]
+
+        nearest = int(round(t))
+        update_labels = nearest != self.shown_labels
+        self.shown_labels = nearest
+
+        x_kde = (np.arange(self.grid_size) + 0.5) / self.grid_size * self.num_bins  # the grid of binned_kde, in bar units
+        for (barchart, kde_line, min_label, max_label), bar_heights, curve, extremes in zip(
+            self.submobjects, heights, curves, self.extremes[nearest]
+        ):
+            # -------- bars: the corners of every bar in one mapping, in the order Rectangle walks them --------
+            left = np.arange(self.num_bins) + (1 - barchart.bar_width) / 2
+            right = left + barchart.bar_width
+            xs = np.stack([right, left, left, right], axis=1)
+            ys = np.stack([bar_heights, bar_heights, np.zeros_like(bar_heights), np.zeros_like(bar_heights)], axis=1)
+            corners = chart_points(barchart, xs.ravel(), ys.ravel()).reshape(self.num_bins, 4, 3)
+            for bar, bar_corners in zip(barchart.bars, corners):
+                bar.set_points_as_corners([*bar_corners, bar_corners[0]])
+
+            kde_line.set_points_as_corners(chart_points(barchart, x_kde, curve))
+
+            if update_labels:  # new labels are made at the scale the plot has been scaled to since
+                axis_start, axis_end = chart_points(barchart, [0, self.num_bins], [0, 0])
+                scale = np.linalg.norm(axis_end - axis_start) / self.width
+                new_min_label, new_max_label = extreme_labels(barchart, extremes, self.font_size * scale)
+                min_label.become(new_min_label)
+                max_label.become(new_max_label)
+        return self
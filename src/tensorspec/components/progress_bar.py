@@ -1,4 +1,5 @@
 from manim import Rectangle, Text, VGroup, WHITE, BLUE, RIGHT
+from src.tensorspec.utils.labels import cached_label
 
 
 def make_progress_bar(labels: list[str], selected_idx=0, use_opengl_renderer=False):
@@ -14,7 +15,7 @@ def make_progress_bar(labels: list[str], selected_idx=0, use_opengl_renderer=Fal
         from manim.mobject.opengl.opengl_vectorized_mobject import OpenGLVGroup as VGroup
     rectangles = [Rectangle(color=WHITE, fill_opacity=1, width=0.2, height=0.1) for i in range(len(labels))]
     rectangles[selected_idx].set_color(BLUE)
-    text = Text(labels[selected_idx]).scale(0.2)
+    text = cached_label(Text, labels[selected_idx]).scale(0.2)
     rectangles[selected_idx] = Rectangle(color=BLUE, fill_opacity=1, width=text.get_width(), height=0.2)
     text.move_to(rectangles[selected_idx].get_center())
     rectangles[selected_idx].add(text)
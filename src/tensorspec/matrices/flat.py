@@ -9,16 +9,28 @@ from manim import (
     BLACK,
     WHITE,
     VGroup,
+    VMobject,
     ImageMobject,
     FadeIn,
     Create,
     Tex,
     Write,
+    Dot,
+    UR,
+    RESAMPLING_ALGORITHMS,
 )
 import inspect
 from torch.nn import functional as F
+import matplotlib.pyplot as plt
 import numpy as np
-from PIL import Image
+import torch
+from src.tensorspec.relation.arrow import points_per_curve, segment_points
+from src.tensorspec.utils import profiling
+from src.tensorspec.utils.stats import normalize
+from src.tensorspec.utils.labels import cached_label
+from src.tensorspec.utils.image import load_image_channels
+
+ELLIPSIS_SLOTS = 4  # empty channel slots between the back and the front channels of a collapsed stack, where the dots go
 
 
 class FlatMatrix3DBase(Mobject):
@@ -29,6 +41,7 @@ class FlatMatrix3DBase(Mobject):
         self.font_color = kwargs.get("font_color", WHITE)
         self.total_channel_thickness = kwargs.get("total_channel_thickness", 1.5)
         self.label_font_size = kwargs.get("label_font_size", 24)
+        self.max_channels = kwargs.get("max_channels")  # None: every channel is drawn, see collapse_channels
         # ================== pop kwargs for parent ==================
         parent_params = inspect.signature(super().__init__).parameters
         [kwargs.pop(kw) for kw in list(kwargs.keys()) if kw not in parent_params]
@@ -37,9 +50,41 @@ class FlatMatrix3DBase(Mobject):
         assert len(self.dimensions) == 3, "dimensions must be a tuple of length 3"
 
         self.num_channels, self.dimensions_2d = self.dimensions[0], self.dimensions[1:]
+        self.drawn_channels, self.channel_slots, self.ellipsis_slots = self.collapse_channels(
+            self.num_channels, self.max_channels
+        )
         # self.total_channel_thickness = self.get_channel_thickness(self.num_channels)
-        self.stroke_width = self.get_stroke_width(self.num_channels)
-        self.between_channel_distance = self.total_channel_thickness / ((self.num_channels - 1) + 1e-8)
+        self.stroke_width = self.get_stroke_width(len(self.drawn_channels))
+        self.between_channel_distance = self.total_channel_thickness / (self.channel_slots[-1] + 1e-8)
+
+    @staticmethod
+    def collapse_channels(channels: int, max_channels=None):
+        """
+        Which channels are drawn, and where. Stacks deeper than max_channels keep their max_channels // 2 back and the rest of the
+        front channels, with ELLIPSIS_SLOTS empty slots between them for the dots; the slots still span the whole thickness.
+        Returns:
+            - np.ndarray: The indices of the drawn channels, back to front.
+            - np.ndarray: Their slot along the stack; slot k is shifted by k * between_channel_distance down left.
+            - np.ndarray: The slots of the ellipsis dots; empty when every channel is drawn.
+        """
+        if max_channels is None or channels <= max_channels:
+            return np.arange(channels), np.arange(channels), np.array([])
+        assert max_channels >= 2, f"max_channels must keep at least one back and one front channel, got {max_channels}"
+        back, front = max_channels // 2, max_channels - max_channels // 2
+        drawn = np.concatenate([np.arange(back), np.arange(channels - front, channels)])
+        slots = np.concatenate([np.arange(back), back + ELLIPSIS_SLOTS + np.arange(front)])
+        ellipsis = back - 1 + (ELLIPSIS_SLOTS + 1) * np.arange(1, 4) / 4  # three dots, evenly between the two drawn channels
+        return drawn, slots, ellipsis
+
+    def make_ellipsis(self, corner, color):
+        """The dots of a collapsed stack, on the top right corners of the empty slots; corner: the one of the unshifted channel."""
+        radius = 0.3 * self.between_channel_distance
+        return VGroup(
+            *[
+                Dot(corner + slot * self.between_channel_distance * DL, radius=radius, color=color)
+                for slot in self.ellipsis_slots
+            ]
+        )
 
     def get_stroke_width(self, channels: int):
         """dynamic stroke width based on the number of channels"""
@@ -75,37 +120,59 @@ def channel_interpolate(tensor, out_channels):
     return tensor
 
 
+def tensor_cells(tensor, dimensions, value_range=None, cmap="seismic"):
+    """
+    The (c, h, w, 4) uint8 RGBA colours of the grid cells of a (C, H, W) tensor shown as a matrix of the given (c, h, w)
+    dimensions: channel_interpolate to c channels, adaptive average pooling to h x w cells, then one colormap lookup for all cells.
+    Parameters:
+        - tensor (torch.Tensor): The (C, H, W) tensor, e.g. a feature map.
+        - dimensions (tuple): The (c, h, w) of the matrix.
+        - value_range (tuple, optional): The (min, max) mapped onto the colormap; None: the range of the pooled tensor.
+        - cmap (str, optional): The matplotlib colormap. Default is "seismic".
+    """
+    with torch.no_grad():
+        tensor = torch.as_tensor(tensor).detach().float()
+        if tensor.shape[0] != dimensions[0]:
+            tensor = channel_interpolate(tensor, dimensions[0])
+        cells = F.adaptive_avg_pool2d(tensor, tuple(dimensions[1:])).numpy()
+    return plt.get_cmap(cmap)(normalize(cells, value_range), bytes=True)
+
+
 class FlatMatrix3DImage(FlatMatrix3DBase):
     """
-    IMPORTANT: too much pain to decode the image; just paste it in as a png; right now this can't be used in transformations
+    IMPORTANT: too much pain to decode the image; just paste it in as a png; right now this can't be used in transformations,
+    but update_tensor() can show new values in place
     """
 
     def __init__(self, **kwargs):
-        """additional params: image_path: Path"""
+        """
+        additional params: image_path: Path; composite: bool (default False), the whole stack (images and grid strokes) is painted
+        into one RGBA texture shown by a single ImageMobject, expand() splits it into the per-channel mobjects again;
+        supersample: int (default 4), texture pixels per image pixel of the composite;
+        cache_dir: Path (default None), where the decoded image channels are kept between runs, see utils.image.load_image_channels
+        """
         self.image_path = kwargs.get("image_path")
+        self.composite = kwargs.get("composite", False)
+        self.supersample = kwargs.get("supersample", 4)
+        self.cache_dir = kwargs.get("cache_dir")
+        self.tensor = None  # the last tensor shown by update_tensor
+        self.value_range = None  # the (min, max) of the grey levels, kept across update_tensor calls
         super().__init__(**kwargs)
         assert isinstance(self.image_path, Path), "image_path must be a Path object"
         self.make_matrix()
 
-    def make_matrix(self):
+    def channel_arrays(self):
         """
-        1. read the image; if the image shape is not (c, h, w), then transpose it to (c, h, w); convert to rgb
-        2. resize the image to the self.dimensions_2d, which is a tuple of (height, width)
-        3. convert to a tensor
-        the order of the above doesn't matter, the goal is to get a tensor of shape (c, h, w) of the resized image
-        4. if the image channel is smaller than the self.num_channels, interpolate it to the self.num_channels
+        The image channels of the drawn channels: the image is read as rgb and resized to twice self.dimensions_2d,
+        its channels repeated cyclically up to self.num_channels; decoded once per image and size, see load_image_channels.
         """
-        image_tensor = Image.open(self.image_path).convert("RGB")
-        image_tensor = image_tensor.resize((2 * i for i in self.dimensions_2d))
-        image_tensor = np.array(image_tensor)
-        # resize to the self.dimensions_2d
+        size = tuple(2 * i for i in self.dimensions_2d)
+        rgb_data = load_image_channels(self.image_path, size, self.num_channels, cache_dir=self.cache_dir)
+        return [rgb_data[i] for i in self.drawn_channels]
 
-        rgb_data = [image_tensor[:, :, i] for i in range(image_tensor.shape[-1])]
-        rgb_data = [rgb_data[i % len(rgb_data)] for i in range(self.num_channels)]
-
-        self.rgb_mobjects_list = [
-            ImageMobject(rgb_data[i]).scale_to_fit_width(self.dimensions_2d[0]) for i in range(self.num_channels)
-        ]
+    def channel_images(self, rgb_data):
+        """One Group(ImageMobject, grid Rectangle) per drawn channel, each shifted down left from the one before."""
+        self.rgb_mobjects_list = [ImageMobject(channel).scale_to_fit_width(self.dimensions_2d[0]) for channel in rgb_data]
         self.masks_obj_list = [
             Rectangle(
                 height=self.dimensions_2d[0],
@@ -120,40 +187,165 @@ class FlatMatrix3DImage(FlatMatrix3DBase):
             .set_stroke(width=self.stroke_width)
             .scale_to_fit_width(self.rgb_mobjects_list[i].width)
             .move_to(self.rgb_mobjects_list[i].get_center())
-            for i in range(self.num_channels)
+            for i in range(len(self.rgb_mobjects_list))
         ]
 
-        self.data = []
-        for i in range(self.num_channels):
+        data = []
+        for i in range(len(self.rgb_mobjects_list)):
             masked_channel = Group(self.rgb_mobjects_list[i], self.masks_obj_list[i])
-            self.data.append(masked_channel)
-        self.data = Group(*self.data)
-        for i, channel in enumerate(self.data):
-            channel.shift(i * self.between_channel_distance * DL)
+            data.append(masked_channel)
+        data = Group(*data)
+        for slot, channel in zip(self.channel_slots, data):
+            channel.shift(slot * self.between_channel_distance * DL)
+        return data
+
+    def paint_composite(self, rgb_data):
+        """
+        The stack channel_images draws, painted back to front into one RGBA array: every channel's image (nearest resampled to
+        supersample texture pixels per image pixel) with its white grid on top, so the channels in front cover the ones behind.
+        The strokes are part of the texture, so they scale with the matrix instead of keeping their width like vector strokes.
+        """
+        rows, cols = rgb_data[0].shape
+        width = self.dimensions_2d[0]  # channel_images fits the channels to this width
+        image_height, mask_height = width * rows / cols, width * self.dimensions_2d[0] / self.dimensions_2d[1]
+        height = max(image_height, mask_height)
+        shifts = self.channel_slots * self.between_channel_distance
+        depth = shifts[-1]
+
+        scale = self.supersample * cols / width  # texture pixels per unit
+        line = max(1, round(self.stroke_width * self.supersample / 4))  # stroke width in texture pixels
+        pad = line  # room for the half of the outer strokes outside the channels
+        self.texture_margin = pad / scale
+        canvas = np.zeros((round((height + depth) * scale) + 2 * pad, round((width + depth) * scale) + 2 * pad, 4), np.uint8)
+
+        grid_step = width / self.dimensions_2d[1]
+        grid_x = np.concatenate([[0], np.arange(1, int(self.dimensions_2d[1])) * grid_step, [width]])
+        grid_y = np.concatenate([[0], np.arange(1, int(self.dimensions_2d[0])) * grid_step, [mask_height]])
+        for channel, shift in zip(rgb_data, shifts):
+            left = pad + (depth - shift) * scale
+            top, right = pad + ((height - image_height) / 2 + shift) * scale, left + width * scale
+            row_0, row_1, column_0, column_1 = round(top), round(top + image_height * scale), round(left), round(right)
+            row_index = np.arange(row_1 - row_0) * rows // (row_1 - row_0)
+            column_index = np.arange(column_1 - column_0) * cols // (column_1 - column_0)
+            canvas[row_0:row_1, column_0:column_1, :3] = channel[row_index[:, None], column_index[None, :], None]
+            canvas[row_0:row_1, column_0:column_1, 3] = 255
+
+            mask_top = pad + ((height - mask_height) / 2 + shift) * scale
+            mask_rows = slice(round(mask_top) - line // 2, round(mask_top + mask_height * scale) - line // 2 + line)
+            mask_columns = slice(column_0 - line // 2, column_1 - line // 2 + line)
+            for x in left + grid_x * scale:
+                canvas[mask_rows, round(x) - line // 2 : round(x) - line // 2 + line] = 255
+            for y in mask_top + grid_y * scale:
+                canvas[round(y) - line // 2 : round(y) - line // 2 + line, mask_columns] = 255
+        return canvas
+
+    def composite_image(self, rgb_data):
+        """paint_composite as one ImageMobject, placed where channel_images puts the stack."""
+        depth = self.channel_slots[-1] * self.between_channel_distance
+        composite = ImageMobject(self.paint_composite(rgb_data))
+        composite.scale_to_fit_width(self.dimensions_2d[0] + depth + 2 * self.texture_margin)
+        return Group(composite.move_to(np.array([-depth / 2, -depth / 2, 0])))
+
+    def update_tensor(self, tensor, value_range=None):
+        """
+        Shows a (C, H, W) tensor in place of the image: it is resized to the channels and pixels of the image channels
+        (channel_interpolate, adaptive average pooling), mapped onto grey levels and copied into the existing pixel buffers;
+        no mobject is rebuilt, so it can be called every frame (see matrices.update.UpdateTensor).
+        Parameters:
+            - tensor (torch.Tensor): The new (C, H, W) values.
+            - value_range (tuple, optional): Replaces the (min, max) mapped onto black and white; kept for later updates.
+              While none was given, every call maps the range of its own resized tensor.
+        """
+        self.tensor = tensor
+        self.value_range = self.value_range if value_range is None else value_range
+        rows, cols = self.rgb_data[0].shape
+        with torch.no_grad():
+            tensor = channel_interpolate(torch.as_tensor(tensor).detach().float(), self.num_channels)
+            values = F.adaptive_avg_pool2d(tensor, (rows, cols)).numpy()
+        grey = (normalize(values, self.value_range) * 255).astype(np.uint8)
+        self.rgb_data = rgb_data = [grey[i] for i in self.drawn_channels]
+        if self.composite:
+            # the alpha channel is the layout of the stack, the same for any values; keeping it keeps any fading
+            self.data[0].pixel_array[..., :3] = self.paint_composite(rgb_data)[..., :3]
+        else:
+            for channel, image in zip(rgb_data, self.rgb_mobjects_list):
+                image.pixel_array[..., :3] = channel[..., None]  # the alpha channel keeps any fading
+        return self
+
+    def expand(self):
+        """Replaces the composite texture by channel_images, placed where it is now, e.g. to animate single channels."""
+        if not self.composite:
+            return self
+        channels = self.channel_images(self.rgb_data)
+        composite = self.data[0]
+        channels.stretch(composite.width / (channels.width + 2 * self.texture_margin), 0)
+        channels.stretch(composite.height / (channels.height + 2 * self.texture_margin), 1)
+        channels.move_to(composite.get_center())
+        self.remove(self.data)
+        self.data, self.composite = channels, False
+        self.add_to_back(self.data)
+        return self
 
-        self.text_obj = Text(self.label, color=self.font_color)
+    @profiling.profiled("FlatMatrix3DImage.make_matrix")
+    def make_matrix(self):
+        self.rgb_data = rgb_data = self.channel_arrays()  # what the drawn channels show; replaced by update_tensor
+        self.data = self.composite_image(rgb_data) if self.composite else self.channel_images(rgb_data)
+        aspect = max(rgb_data[0].shape[0] / rgb_data[0].shape[1], self.dimensions_2d[0] / self.dimensions_2d[1])
+        corner = np.array([1, aspect, 0]) * self.dimensions_2d[0] / 2  # top right of the unshifted channel
+        self.ellipsis = self.make_ellipsis(corner, WHITE)
+
+        self.text_obj = cached_label(Text, self.label, color=self.font_color)
         self.text_obj = self.text_obj.next_to(self.data, UP, buff=self.data.height * 0.1).scale_to_fit_width(
             self.data.width * 0.05 * len(self.label)
         )
 
-        self.add(self.data, self.text_obj)
+        self.add(self.data, self.ellipsis, self.text_obj)
 
     def on_create(self):
         animations = []
-        for masked_channel in self.data:
-            for mobject in masked_channel:
-                animations.append(FadeIn(mobject))
+        if self.composite:
+            animations.append(FadeIn(self.data))
+        else:
+            for masked_channel in self.data:
+                for mobject in masked_channel:
+                    animations.append(FadeIn(mobject))
+        if self.ellipsis.submobjects:
+            animations.append(FadeIn(self.ellipsis))
         animations.append(Write(self.text_obj))
         return animations
 
 
 class FlatMatrix3D(FlatMatrix3DBase):
     def __init__(self, **kwargs):
+        """
+        additional params: instanced: bool (default False); the stack is drawn as one fill and one stroke mobject instead of
+        num_channels rectangles with their own grid lines, when the channels overlap; expand() turns it into the rectangles when
+        they are animated one by one;
+        tensor: a (C, H, W) torch.Tensor (default None) whose values colour the grid cells, see tensor_cells; dimensions defaults
+        to its shape; value_range: (min, max) (default None) and cmap: str (default "seismic") of the colours
+        """
+        self.instanced = kwargs.get("instanced", False)
+        self.tensor = kwargs.get("tensor")
+        self.value_range = kwargs.get("value_range")
+        self.cmap = kwargs.get("cmap", "seismic")
+        if self.tensor is not None and kwargs.get("dimensions") is None:
+            kwargs["dimensions"] = tuple(self.tensor.shape)
         super().__init__(**kwargs)
         self.make_matrix()
 
-    def make_matrix(self):
-        self.matrix = VGroup(
+    @staticmethod
+    def tex_strings(**kwargs):
+        """The Tex labels (cached_label arguments) of a FlatMatrix3D made with kwargs; for utils.latex.precompile_tex."""
+        label_kwargs = {"color": kwargs.get("font_color", WHITE), "font_size": kwargs.get("label_font_size", 24)}
+        return [(Tex, kwargs.get("label"), label_kwargs)]
+
+    @property
+    def stroke_color(self):
+        return WHITE if self.main_color == BLACK else BLACK
+
+    def channel_rectangles(self):
+        """The stack as one Rectangle (with its grid lines) per channel, each shifted down left from the one before."""
+        rectangles = VGroup(
             *[
                 Rectangle(
                     height=self.dimensions_2d[0],
@@ -162,31 +354,164 @@ class FlatMatrix3D(FlatMatrix3DBase):
                     grid_ystep=1.0,
                     fill_opacity=1,
                     fill_color=self.main_color,
-                    color=WHITE if self.main_color == BLACK else BLACK,  # stroke
+                    color=self.stroke_color,
                     stroke_width=self.stroke_width,
                 ).set_stroke(width=self.stroke_width)
-                for _ in range(self.num_channels)
+                for _ in self.drawn_channels
             ]
         )
-        for i, rect in enumerate(self.matrix):
-            rect.shift(i * self.between_channel_distance * DL)
+        for slot, rect in zip(self.channel_slots, rectangles):
+            rect.shift(slot * self.between_channel_distance * DL)
+        return rectangles
+
+    def instanced_rectangles(self):
+        """
+        The same stack as channel_rectangles as two vmobjects, from one rectangle and the offsets of the channels:
+        the fill of the union of the rectangles (a staircase polygon), and the strokes left visible by the opaque channels in front,
+        i.e. the top / right edges and grid lines of the back channels (an L-shaped strip as wide as the gap to the next channel)
+        and the whole outline and grid of the front one.
+        """
+        height, width = self.dimensions_2d
+        x0, x1, y0, y1 = -width / 2, width / 2, -height / 2, height / 2
+        shifts = self.channel_slots * self.between_channel_distance  # along DL, the same in x and y
+        gaps = np.diff(shifts)
+        strip_x, strip_y = np.minimum(gaps, width), np.minimum(gaps, height)
+
+        def lines(x_start, y_start, x_end, y_end):
+            """(..., 2, 2) segments from broadcast coordinates."""
+            starts = np.stack(np.broadcast_arrays(x_start, y_start), axis=-1)
+            ends = np.stack(np.broadcast_arrays(x_end, y_end), axis=-1)
+            return np.stack(np.broadcast_arrays(starts, ends), axis=-2)
+
+        # -------- fill: down the right side of the back channel, the steps to the front one, and back up the left side --------
+        back, next_ = shifts[:-1], shifts[1:]
+        right_steps = lines(x1 - back, y0 - back, x1 - next_, y0 - back).reshape(-1, 2)
+        left_steps = lines(x0 - back, y1 - next_, x0 - back, y1 - back)[::-1].reshape(-1, 2)
+        front = -shifts[-1]
+        polygon = [[x0, y1], [x1, y1], *right_steps, front + [x1, y0], front + [x0, y0], front + [x0, y1], *left_steps]
+        polygon = np.array(polygon if len(shifts) > 1 else [[x0, y1], [x1, y1], [x1, y0], [x0, y0], [x0, y1]])
+
+        # -------- strokes: (start, end) of every visible segment --------
+        grid_x = x0 + np.arange(1, int(width))  # where Rectangle(grid_xstep=1) puts its vertical lines
+        grid_y = y1 - np.arange(1, int(height))
+        ones, strip_x, strip_y = np.ones((len(gaps), 1)), strip_x[:, None], strip_y[:, None]
+        back_segments = np.concatenate(
+            [
+                lines(x0 * ones, y1 - strip_y, x0, y1),  # the L-shaped outline, as one path
+                lines(x0 * ones, y1, x1, y1),
+                lines(x1 * ones, y1, x1, y0),
+                lines(x1 * ones, y0, x1 - strip_x, y0),
+                lines(grid_x * ones, y1 - strip_y, grid_x, y1),
+                lines(x1 - strip_x, grid_y * ones, x1, grid_y),
+            ],
+            axis=1,
+        )
+        back_segments = (back_segments - back[:, None, None, None]).reshape(-1, 2, 2)
+        corners = np.array([[x0, y1], [x1, y1], [x1, y0], [x0, y0], [x0, y1]])
+        front_segments = np.concatenate(
+            [np.stack([corners[:-1], corners[1:]], axis=1), lines(grid_x, y1, grid_x, y0), lines(x0, grid_y, x1, grid_y)]
+        )
+        segments = np.concatenate([back_segments, front_segments + front])
+        segments = np.concatenate([segments, np.zeros((*segments.shape[:2], 1))], axis=2)  # z = 0
+
+        fill = VMobject(fill_color=self.main_color, fill_opacity=1, stroke_width=0)
+        fill.set_points_as_corners(np.concatenate([polygon, np.zeros((len(polygon), 1))], axis=1))
+        strokes = VMobject(stroke_color=self.stroke_color, stroke_width=self.stroke_width)
+        strokes.set_points(segment_points(segments, points_per_curve(strokes)))
+        return VGroup(fill, strokes)
+
+    def channels_overlap(self):
+        """Whether every channel overlaps the next one; the staircase fill of instanced_rectangles walks inside the rectangles."""
+        gaps = np.diff(self.channel_slots) * self.between_channel_distance
+        return bool(np.all(gaps < min(self.dimensions_2d)))
+
+    def expand(self):
+        """Replaces the instanced stack by channel_rectangles, placed where the stack is now, e.g. to animate single channels."""
+        if not self.instanced:
+            return self
+        fill, strokes = self.matrix
+        rectangles = self.channel_rectangles().replace(self.matrix, stretch=True)
+        rectangles.set_fill(fill.get_fill_color(), opacity=fill.get_fill_opacity())
+        rectangles.set_stroke(
+            strokes.get_stroke_color(), width=strokes.get_stroke_width(), opacity=strokes.get_stroke_opacity()
+        )
+        self.remove(self.matrix, *([] if self.cells is None else [self.cells]))
+        self.matrix, self.instanced = rectangles, False
+        self.add_stack()
+        return self
+
+    def cell_images(self):
+        """One ImageMobject per drawn channel, a pixel per grid cell (nearest resampled, so cells stay sharp), on its rectangle."""
+        colors = tensor_cells(self.tensor, self.dimensions, self.value_range, self.cmap)
+        height, width = self.dimensions_2d
+        cells = Group()
+        for channel, slot in zip(self.drawn_channels, self.channel_slots):
+            image = ImageMobject(colors[channel]).set_resampling_algorithm(RESAMPLING_ALGORITHMS["nearest"])
+            image.stretch_to_fit_width(width).stretch_to_fit_height(height)
+            cells.add(image.move_to(slot * self.between_channel_distance * DL))
+        return cells
+
+    def update_tensor(self, tensor, value_range=None):
+        """
+        Colours the cells from a new (C, H, W) tensor, copied into the pixel buffers of the existing cell images (see tensor_cells);
+        no mobject is rebuilt, so it can be called every frame (see matrices.update.UpdateTensor).
+        Parameters:
+            - tensor (torch.Tensor): The new values; pooled to the matrix like the tensor it was made from.
+            - value_range (tuple, optional): Replaces the (min, max) of the colormap; kept for later updates.
+        """
+        assert self.cells is not None, "only a FlatMatrix3D made from a tensor can be updated"
+        self.tensor = tensor
+        self.value_range = self.value_range if value_range is None else value_range
+        colors = tensor_cells(tensor, self.dimensions, self.value_range, self.cmap)
+        for channel, image in zip(self.drawn_channels, self.cells):
+            image.pixel_array[..., :3] = colors[channel, ..., :3]  # the alpha channel keeps any fading
+        return self
+
+    def add_stack(self):
+        """
+        Puts the stack behind the labels: the matrix alone, or with a tensor the cell images under the strokes. The instanced
+        strokes only cover what the channels in front leave visible, so they go on top of all images; separate rectangles are
+        interleaved with the images, each channel's image and grid before the next channel.
+        """
+        if self.cells is None:
+            self.add_to_back(self.matrix)
+        elif self.instanced:
+            self.add_to_back(self.cells, self.matrix)
+        else:
+            self.add_to_back(*[mobject for pair in zip(self.cells, self.matrix) for mobject in pair])
+
+    @profiling.profiled("FlatMatrix3D.make_matrix")
+    def make_matrix(self):
+        self.instanced = self.instanced and self.channels_overlap()  # wider gaps fall back to separate rectangles
+        self.matrix = self.instanced_rectangles() if self.instanced else self.channel_rectangles()
+        self.cells = None if self.tensor is None else self.cell_images()
+        if self.cells is not None:
+            self.matrix.set_fill(opacity=0)  # the images are the fill
+        height, width = self.dimensions_2d
+        self.ellipsis = self.make_ellipsis(np.array([width / 2, height / 2, 0]), self.stroke_color)
 
-        self.dimension_label = Text(str(self.dimensions), font_size=self.label_font_size, color=WHITE)
+        self.dimension_label = cached_label(Text, str(self.dimensions), font_size=self.label_font_size, color=WHITE)
         self.dimension_label = self.dimension_label.next_to(self.matrix, UP, buff=self.matrix.height * 0.1).scale_to_fit_width(
             self.matrix.width * 0.03 * len(str(self.dimensions))
         )
 
-        self.text_str = Tex(self.label, color=self.font_color, font_size=self.label_font_size)
+        with profiling.timed("tex", label=self.label):
+            self.text_str = cached_label(Tex, self.label, color=self.font_color, font_size=self.label_font_size)
         self.text_str = self.text_str.next_to(self.dimension_label, UP, buff=self.matrix.height * 0.1).scale_to_fit_width(
             self.matrix.width * 0.05 * len(self.label)
         )
 
-        self.add(self.matrix, self.text_str, self.dimension_label)
+        self.add(self.ellipsis, self.text_str, self.dimension_label)
+        self.add_stack()
 
     def on_create(self):
         animations = []
+        if self.cells is not None:
+            animations.append(FadeIn(self.cells))
         for rect in self.matrix:
             animations.append(Create(rect))
+        if self.ellipsis.submobjects:
+            animations.append(FadeIn(self.ellipsis))
         animations.append(Write(self.text_str))
         animations.append(Write(self.dimension_label))
         return animations
@@ -0,0 +1,45 @@
+"""
+Animating new values of tensor-backed matrices (FlatMatrix3D made from a tensor, FlatMatrix3DImage, Matrix3DMatplotlib):
+every frame pushes the interpolated tensor into the existing matrix with its update_tensor(). Nothing is rebuilt or
+transformed: the flat matrices recolour their cells / grey levels and copy them into their pixel buffers, so a frame costs a
+pooling and a buffer copy. Matrix3DMatplotlib still re-renders every batch with matplotlib on every frame (in memory,
+bypassing its cache), so keep such animations short or use a flat matrix. Colours and values are updated, opacities are kept.
+
+e.g.
+    matrix = FlatMatrix3D(tensor=activations[0], label="Conv")
+    for step in activations[1:]:
+        self.play(UpdateTensor(matrix, step), run_time=0.2)
+"""
+
+from manim import Animation
+import torch
+
+
+class UpdateTensor(Animation):
+    def __init__(self, mobject, tensor, start=None, value_range=None, **kwargs):
+        """
+        Parameters:
+            - mobject (Mobject): A matrix with update_tensor(tensor, value_range) and the tensor it shows as .tensor.
+            - tensor (torch.Tensor): The values shown at the end of the animation.
+            - start (torch.Tensor, optional): The values shown at the start. Default is the tensor the matrix shows now.
+            - value_range (tuple, optional): The (min, max) of the colours during the whole animation; fixing it keeps the colours
+              of unchanged values still. Default is the range the matrix already uses (or each frame's own range).
+            - **kwargs: Passed on to Animation (run_time, rate_func...).
+        """
+        start = mobject.tensor if start is None else start
+        assert start is not None, "the matrix shows no tensor yet; pass start"
+        assert (
+            start.shape == tensor.shape
+        ), f"start and end tensors differ in shape: {tuple(start.shape)} and {tuple(tensor.shape)}"
+        self.start_tensor = torch.as_tensor(start).detach().float()
+        self.end_tensor = torch.as_tensor(tensor).detach().float()
+        self.value_range = value_range
+        super().__init__(mobject, **kwargs)
+
+    def create_starting_mobject(self):
+        # the matrix is only written to, never interpolated from a copy; copying it would cost more than the updates
+        return self.mobject
+
+    def interpolate_mobject(self, alpha):
+        tensor = torch.lerp(self.start_tensor, self.end_tensor, self.rate_func(alpha))
+        self.mobject.update_tensor(tensor, self.value_range)
@@ -1,6 +1,8 @@
 import inspect
 import numpy as np
 from manim import RoundedRectangle, Text, VMobject, WHITE, Write, Create, MarkupText, Tex
+from src.tensorspec.utils import profiling
+from src.tensorspec.utils.labels import cached_label
 
 
 class NetNode(VMobject):
@@ -23,6 +25,13 @@ class NetNode(VMobject):
         # ===========================================================
         self.make_node()
 
+    @staticmethod
+    def tex_strings(**kwargs):
+        """The Tex labels (cached_label arguments) of a NetNode made with kwargs; for utils.latex.precompile_tex."""
+        label_kwargs = {"color": kwargs.get("text_color", WHITE), "font_size": kwargs.get("text_font_size", 24)}
+        return [(Tex, kwargs.get("text", "Node"), label_kwargs)]
+
+    @profiling.profiled("NetNode.make_node")
     def make_node(self):
         self.node_rec = RoundedRectangle(
             corner_radius=0.1,
@@ -32,7 +41,9 @@ class NetNode(VMobject):
             fill_color=self.node_color,
             stroke_color=self.text_color,
         )
-        self.text_obj = Tex(self.text, color=self.text_color, font_size=self.text_font_size).move_to(self.node_rec.get_center())
+        with profiling.timed("tex", label=self.text):
+            self.text_obj = cached_label(Tex, self.text, color=self.text_color, font_size=self.text_font_size)
+        self.text_obj.move_to(self.node_rec.get_center())
         self.add(self.node_rec, self.text_obj)
 
     # def the behaviour under create
@@ -1,5 +1,8 @@
 import inspect
+import numpy as np
 from manim import UP, DOWN, LEFT, RIGHT, DEGREES, BLACK, Arrow, Mobject, VMobject, LineJointType, FadeIn
+from manim import DEFAULT_ARROW_TIP_LENGTH
+from src.tensorspec.utils import profiling
 
 
 class ConnectionArrow(Mobject):
@@ -109,3 +112,115 @@ class ConnectionArrow(Mobject):
     def on_create(self):
         transforms = [FadeIn(self)]
         return transforms
+
+
+def points_per_curve(vmobject):
+    """The number of points per bezier curve of a vmobject: 4 for cairo's cubic VMobject, 3 for the quadratic OpenGLVMobject."""
+    return getattr(vmobject, "n_points_per_cubic_curve", None) or vmobject.n_points_per_curve
+
+
+def segment_points(segments, points_per_curve):
+    """
+    Points of a VMobject drawing (..., 2, 3) straight segments as bezier curves; segments sharing an end make one path.
+    points_per_curve is the one of the vmobject the points are set on, see points_per_curve().
+    """
+    segments = np.asarray(segments, dtype=float).reshape(-1, 2, 3)
+    t = np.linspace(0, 1, points_per_curve)[:, None]
+    return (segments[:, :1] + t * (segments[:, 1:] - segments[:, :1])).reshape(-1, 3)
+
+
+def edge_centers(mobjects, edges):
+    """
+    get_edge_center(edge) of every (mobject, edge) pair, with the bounding box of each distinct mobject computed once.
+    Parameters:
+        - mobjects (list): N mobjects, repeats allowed.
+        - edges (np.ndarray): (N, 3) edges, each UP, DOWN, LEFT or RIGHT.
+    """
+    boxes = {}
+    for mobject in mobjects:
+        if id(mobject) not in boxes:
+            points = mobject.get_points_defining_boundary()
+            boxes[id(mobject)] = (points.min(axis=0), points.max(axis=0))
+    low, high = (np.array([boxes[id(mobject)][i] for mobject in mobjects]) for i in range(2))
+    return (low + high) / 2 + edges * (high - low) / 2
+
+
+class ConnectionArrows(Mobject):
+    """
+    Many ConnectionArrow at once: the elbow of every connection is computed with numpy, and all of them are drawn by
+    two vmobjects, the lines (one path per connection) and the filled tips, instead of a path and an Arrow per connection.
+    For diagrams with dozens or hundreds of connections; the arrows look like ConnectionArrow's and move / fade together.
+
+    e.g.,
+    arrows = ConnectionArrows(connections=[(block, RIGHT, merge, UP) for block in blocks], stroke_width=3)
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        Parameters:
+            - connections (list): (mobject_from, edge_from, mobject_to, edge_to) tuples, with the edges of ConnectionArrow:
+              one of them UP / DOWN and the other LEFT / RIGHT.
+            - buff (float, optional): The gap between the arrows and the mobjects. Default is 0.1.
+            - stroke_width (float, optional): The width of the lines. Default is 3.
+            - color (ManimColor, optional): The color of the lines and tips. Default is BLACK.
+            - tip_length (float, optional): The length of the tips, at most a quarter of the last segment. Default is manim's.
+        """
+        connections = kwargs.get("connections")
+        assert len(connections) > 0, "connections must not be empty"
+        self.mobjects_from, edges_from, self.mobjects_to, edges_to = (list(column) for column in zip(*connections))
+        self.edges_from = np.array(edges_from, dtype=float)
+        self.edges_to = np.array(edges_to, dtype=float)
+        self.buff = kwargs.get("buff", 0.1)
+        self.stroke_width = kwargs.get("stroke_width", 3)
+        self.arrow_color = kwargs.get("color", BLACK)
+        self.tip_length = kwargs.get("tip_length", DEFAULT_ARROW_TIP_LENGTH)
+        # ================== pop kwargs for parent ==================
+        parent_params = inspect.signature(super().__init__).parameters
+        [kwargs.pop(kw) for kw in list(kwargs.keys()) if kw not in parent_params]
+        super().__init__(*args, **kwargs)
+        # ===========================================================
+        self._check_validity()
+        self._make_straight()
+
+    def _check_validity(self):
+        def axis(edges):
+            """0 for LEFT / RIGHT, 1 for UP / DOWN, -1 for anything else."""
+            unit = (np.abs(edges).sum(axis=1) == 1) & np.isin(edges, (-1, 0, 1)).all(axis=1) & (edges[:, 2] == 0)
+            return np.where(unit, np.abs(edges[:, 1]), -1)
+
+        axis_from, axis_to = axis(self.edges_from), axis(self.edges_to)
+        invalid = np.flatnonzero((axis_from < 0) | (axis_to < 0) | (axis_from == axis_to))
+        assert len(invalid) == 0, f"Invalid edge combination in connections {invalid.tolist()}"
+
+    @profiling.profiled("ConnectionArrows.make_straight")
+    def _make_straight(self):
+        start_points = edge_centers(self.mobjects_from, self.edges_from) + self.buff * self.edges_from
+        end_points = edge_centers(self.mobjects_to, self.edges_to) + self.buff * self.edges_to
+
+        # -------- turning points: leave the from edge perpendicularly, reach the to edge perpendicularly --------
+        vertical = self.edges_from[:, 1:2] != 0
+        turning_points = np.where(vertical, start_points, end_points)
+        turning_points[:, 1] = np.where(vertical[:, 0], end_points[:, 1], start_points[:, 1])
+        turning_points[:, 2] = 0
+
+        # -------- tips: a triangle with its apex at the end point, as Arrow(turning_point, end_point) draws it --------
+        last = end_points - turning_points
+        last_length = np.linalg.norm(last, axis=1, keepdims=True)
+        direction = np.where(last_length > 0, last / np.maximum(last_length, 1e-8), -self.edges_to)
+        tip_length = np.minimum(self.tip_length, 0.25 * last_length)
+        tip_base = end_points - tip_length * direction
+        half_width = 0.5 * tip_length * np.stack([-direction[:, 1], direction[:, 0], np.zeros(len(direction))], axis=1)
+        triangles = np.stack([end_points, tip_base + half_width, tip_base - half_width, end_points], axis=1)
+
+        lines = np.stack([start_points, turning_points, tip_base], axis=1)
+        self.lines = VMobject(stroke_color=self.arrow_color, stroke_width=self.stroke_width, joint_type=LineJointType.ROUND)
+        self.lines.set_points(segment_points(np.stack([lines[:, :-1], lines[:, 1:]], axis=2), points_per_curve(self.lines)))
+        self.tips = VMobject(fill_color=self.arrow_color, fill_opacity=1, stroke_width=0)
+        self.tips.set_points(
+            segment_points(np.stack([triangles[:, :-1], triangles[:, 1:]], axis=2), points_per_curve(self.tips))
+        )
+        self.add(self.lines, self.tips)
+
+    def on_create(self):
+        transforms = [FadeIn(self)]
+        return transforms
@@ -1,4 +1,5 @@
 from manim import Group, Mobject, DL, UR, Tex, Rectangle, BLACK, WHITE, UP, DOWN
+from src.tensorspec.utils.labels import cached_label
 
 
 def bounding_moject(mobject: Mobject, label: str, font_size=32):
@@ -19,6 +20,11 @@ def bounding_moject(mobject: Mobject, label: str, font_size=32):
         .shift(DOWN * 0.1)
     )
 
-    label = Tex(label, color=BLACK, font_size=font_size).next_to(box, UP * 2)
+    label = cached_label(Tex, label, color=BLACK, font_size=font_size).next_to(box, UP * 2)
 
     return Group(box, label)
+
+
+def bounding_tex_strings(label: str, font_size=32):
+    """The Tex label (cached_label arguments) of bounding_moject(mobject, label, font_size); for utils.latex.precompile_tex."""
+    return [(Tex, label, {"color": BLACK, "font_size": font_size})]
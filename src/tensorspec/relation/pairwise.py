@@ -1,27 +1,96 @@
 import inspect
-from itertools import product
-from manim import Arrow, Mobject
-
-# combinations = list(
-#             product([i.get_right() for i in self.latent_layers], [self.latent_mu.get_left(), self.latent_sigma.get_left()])
-#         )
-#         self.latent_arrows = [
-#             Arrow(*combo, color=BLACK, max_tip_length_to_length_ratio=0, stroke_width=3) for combo in combinations
-#         ]
-#         self.add(*self.latent_arrows)
-
-
-# class PairwiseArrows:
-#     def __init__(self, *args, **kwargs):
-#         self.mobjects_from, self.edge_from = kwargs.get("_from")
-#         self.mobjects_to, self.edge_to = kwargs.get("to")
-#         assert isinstance(self.mobjects_from, list), "mobjects_from must be a list"
-#         assert isinstance(self.mobjects_to, list), "mobjects_to must be a list"
-#         # ================== pop kwargs for parent ==================
-#         parent_params = inspect.signature(super().__init__).parameters
-#         [kwargs.pop(kw) for kw in list(kwargs.keys()) if kw not in parent_params]
-#         super().__init__(*args, **kwargs)
-#         # ===========================================================s
-
-#     def _make_arrows(self):
-#         combinations = list(product(self.mobjects_from, self.mobjects_to))
+import math
+import numpy as np
+from manim import BLACK, MED_SMALL_BUFF, VMobject, UpdateFromAlphaFunc
+from src.tensorspec.relation.arrow import edge_centers, points_per_curve, segment_points
+from src.tensorspec.utils import profiling
+
+
+class PairwiseArrows(VMobject):
+    """
+    connect every mobject of one list to every mobject of another (a fully connected layer)
+    (mobjects_from, edge_from)
+    (mobjects_to, edge_to)
+    all M x N lines, from the from edge of each from mobject to the to edge of each to mobject, are one vmobject whose points
+    are computed at once by broadcasting; there are no tips, like Arrow(max_tip_length_to_length_ratio=0)
+
+    when M x N exceeds max_arrows, the lines are reduced:
+    - "bundle": every from mobject is connected to a hub between the two lists, and the hub to every to mobject (M + N lines)
+    - "thin": max_arrows of the M x N lines, spread evenly over both the from and the to mobjects
+
+    e.g.,
+    arrows = PairwiseArrows(_from=(layers, RIGHT), to=([mu, sigma], LEFT), buff=0.4)
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.mobjects_from, self.edge_from = kwargs.get("_from")
+        self.mobjects_to, self.edge_to = kwargs.get("to")
+        assert isinstance(self.mobjects_from, list), "mobjects_from must be a list"
+        assert isinstance(self.mobjects_to, list), "mobjects_to must be a list"
+        assert len(self.mobjects_from) > 0 and len(self.mobjects_to) > 0, "mobjects_from and mobjects_to must not be empty"
+        self.buff = kwargs.get("buff", MED_SMALL_BUFF)
+        self.max_arrows = kwargs.get("max_arrows", None)
+        self.reduction = kwargs.get("reduction", "bundle")
+        assert self.reduction in ("bundle", "thin"), f"reduction must be 'bundle' or 'thin', got {self.reduction}"
+        kwargs.setdefault("stroke_color", kwargs.get("color", BLACK))  # color isn't a VMobject parameter
+        kwargs.setdefault("stroke_width", 3)
+        # ================== pop kwargs for parent ==================
+        parent_params = inspect.signature(super().__init__).parameters
+        [kwargs.pop(kw) for kw in list(kwargs.keys()) if kw not in parent_params]
+        super().__init__(*args, **kwargs)
+        # ===========================================================
+        self._make_arrows()
+
+    def _segments(self, starts, ends):
+        """
+        (M, 3) and (N, 3) end points -> (K, 2, 3) segments after the reduction, K <= max_arrows unless bundled,
+        and the (K, 2) ends that touch a mobject (all but the hub) for the buff.
+        """
+        num_pairs = len(starts) * len(ends)
+        if self.max_arrows is None or num_pairs <= self.max_arrows:
+            segments = np.stack(np.broadcast_arrays(starts[:, None], ends[None, :]), axis=2).reshape(-1, 2, 3)
+        elif self.reduction == "bundle":
+            hub = (starts.mean(axis=0) + ends.mean(axis=0)) / 2
+            hub = np.broadcast_to(hub, (1, 3))
+            segments = np.concatenate(
+                [np.stack(np.broadcast_arrays(starts, hub), axis=1), np.stack(np.broadcast_arrays(hub, ends), axis=1)]
+            )
+            at_mobject = np.ones((len(segments), 2), dtype=bool)
+            at_mobject[: len(starts), 1] = at_mobject[len(starts) :, 0] = False
+            return segments, at_mobject
+        else:
+            # thin: line k starts at from mobject k * M // K and ends at to mobject k * stride % N; stride is coprime with N,
+            # so every N consecutive lines reach N different to mobjects and both ends keep as many lines as they can
+            lines = np.arange(self.max_arrows)
+            stride = max(round(len(ends) / -(-self.max_arrows // len(starts))), 1)  # spreads the lines of a from mobject
+            while math.gcd(stride, len(ends)) != 1:
+                stride += 1
+            segments = np.stack([starts[lines * len(starts) // self.max_arrows], ends[lines * stride % len(ends)]], axis=1)
+        return segments, np.ones((len(segments), 2), dtype=bool)
+
+    @profiling.profiled("PairwiseArrows.make_arrows")
+    def _make_arrows(self):
+        starts = edge_centers(self.mobjects_from, np.broadcast_to(self.edge_from, (len(self.mobjects_from), 3)))
+        ends = edge_centers(self.mobjects_to, np.broadcast_to(self.edge_to, (len(self.mobjects_to), 3)))
+        segments, at_mobject = self._segments(starts, ends)
+
+        # -------- buff: pull the ends at mobjects towards each other, as Arrow(start, end, buff=buff) does --------
+        vectors = segments[:, 1] - segments[:, 0]
+        lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+        buff = np.minimum(self.buff, lengths / 2)  # lines shorter than 2 * buff shrink to their middle
+        directions = vectors / np.maximum(lengths, 1e-8)
+        segments = segments + (at_mobject * [1, -1])[..., None] * (buff * directions)[:, None]
+
+        self.num_arrows = len(segments)
+        self.set_points(segment_points(segments, points_per_curve(self)))
+
+    def grow(self, mobject, alpha):
+        """Updater of on_create: every line grows from its start at once, like GrowArrow on separate arrows."""
+        curves = self.grown_points.reshape(-1, points_per_curve(self), 3)
+        starts = curves[:, :1]
+        mobject.set_points((starts + alpha * (curves - starts)).reshape(-1, 3))
+
+    def on_create(self):
+        self.grown_points = self.points.copy()
+        transforms = [UpdateFromAlphaFunc(self, self.grow)]
+        return transforms
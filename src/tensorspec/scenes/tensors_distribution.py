@@ -1,8 +1,14 @@
+from collections import deque
 from manim import ThreeDScene, ORIGIN, LEFT, RIGHT, ReplacementTransform, UP
-from src.tensorspec.components.plots import create_distribution_plot
+from src.tensorspec.components.plots import create_distribution_plot, histogram_layout, DistributionPlot
 from src.tensorspec.components.matrices import Matrix3DNative
-from src.tensorspec.components.matrices_plt import Matrix3DMatplotlib
+from src.tensorspec.components.matrices_plt import Matrix3DMatplotlib, sequence_output, RASTER_THRESHOLD
+from src.tensorspec.components.matrices_proj import Matrix3DProjected
 from src.tensorspec.components.progress_bar import make_progress_bar
+from src.tensorspec.utils.lod import apply_lod
+from src.tensorspec.utils.stats import sequence_stats, color_ranges
+from src.tensorspec.utils.loaders import as_tensor
+from src.tensorspec.utils import profiling
 
 
 class TensorVisualizationScene(ThreeDScene):
@@ -15,22 +21,47 @@ class TensorVisualizationScene(ThreeDScene):
             setattr(self.camera, "frame_width", self.get_camera_width())
             setattr(self.camera, "frame_height", self.get_camera_height())
 
-    def construct(self, tensors: list, labels: list, duration_each: float, duration_gap: float, engine: str = "matplotlib"):
+    @profiling.profiled("TensorVisualizationScene.construct")
+    def construct(
+        self,
+        tensors: list,
+        labels: list = None,
+        duration_each: float = 0.8,
+        duration_gap: float = 1,
+        engine: str = "matplotlib",
+        workers: int = 1,
+        matrix_kwargs: dict = None,
+        max_voxels_per_cube: int = None,
+        max_voxels_per_scene: int = None,
+        pooling: str = "mean",
+        lookahead: int = 1,
+        range_mode: str = "unit",
+        shared_range: bool = True,
+        num_bins=100,
+        max_bins: int = 100,
+        fixed_chart: bool = False,
+        normalization: str = "batch",
+    ):
         """
         Visualizes a list of tensors with associated labels using 3D matrix representations and distribution plots.
 
         This function takes in a list of tensors and their associated labels and visualizes them in 3D space.
-        Each tensor is represented as both a 3D matrix and a distribution plot. The rendering can be sped up
-        using either Manim's native 3D matrix methods or a faster version using matplotlib.
+        Each tensor is represented as both a 3D matrix and a distribution plot. The 3D matrix can be made with
+        Manim's native 3D matrix methods, with matplotlib, or by projecting the voxels with numpy.
 
         Parameters:
         ----------
-        tensors : list
+        tensors : list or iterable
             List of tensors to be visualized. Each tensor should be an array-like structure suitable for
             visualization as a 3D matrix.
+            Alternatively an iterator / generator of (tensor, label) pairs, e.g. yielded while loading the checkpoints
+            of a training run; labels must then be None. Tensors are consumed lazily, so memory stays constant.
+            A tensor can also be the path of a .npy, .safetensors or .pt file holding it; the file is memory mapped
+            (utils.loaders) and only read in chunks, so it may be larger than memory. Set max_voxels_per_cube for such
+            tensors, the 3D matrices are made from the pooled tensor.
 
-        labels : list
-            List of labels associated with each tensor. Should be the same length as tensors.
+        labels : list, optional (default: None)
+            List of labels associated with each tensor. Should be the same length as tensors. None when streaming.
 
         duration_each : float
             Duration (in seconds) for each transition from one tensor representation to the next.
@@ -43,18 +74,67 @@ class TensorVisualizationScene(ThreeDScene):
             Available options are:
             - "matplotlib": Uses the matplotlib library for a faster rendering.
             - "native": Uses Manim's native methods for creating the 3D matrix. This option might be slower.
+            - "projected": Projects the voxels with numpy for the same view as matplotlib, without going through ax.voxels.
+
+        workers : int, optional (default: 1)
+            Number of processes plotting the matplotlib voxels of all tensors up front (None: one per cpu).
+            Only used by the "matplotlib" engine; 1 plots each tensor serially while it is constructed.
+
+        matrix_kwargs : dict, optional (default: None)
+            Extra keyword arguments for the 3D matrix class of the engine, e.g. {"in_memory": True} for the matplotlib engine.
+            The matplotlib "output" (svg / png) and the png "dpi" are chosen once for the whole sequence (by the first tensor
+            when streaming), so that consecutive matrices can be transformed into each other.
+
+        max_voxels_per_cube, max_voxels_per_scene : int, optional (default: None)
+            Level of detail: each (c, h, w) batch is pooled down so that it has at most max_voxels_per_cube voxels and all
+            cubes of the scene together at most max_voxels_per_scene. The labels keep the true shape and the distribution
+            plots are made from the full tensors.
+
+        pooling : str, optional (default: "mean")
+            How voxels are pooled for the level of detail: "mean", "max" or "absmax".
+
+        lookahead : int, optional (default: 1)
+            Number of frames (distribution plot + 3D matrix) built ahead of the one on screen. When streaming, the
+            progress bar shows the current label and the labels ahead, and max_voxels_per_scene is shared by the
+            lookahead + 1 frames alive at once.
+
+        range_mode : str, optional (default: "unit")
+            The value range covered by the histograms: "unit" ([0, 1]), "data" (min / max) or "robust" (1st / 99th percentile).
+            Tensors that aren't in [0, 1] need "data" or "robust" to show their whole distribution.
+
+        shared_range : bool, optional (default: True)
+            Use one range and bin count for the whole sequence, computed once before the first frame. Not available when
+            streaming, where every tensor gets its own range.
+
+        num_bins : int or "auto", optional (default: 100)
+            The number of histogram bars; "auto" picks it from the data (Freedman-Diaconis), at most max_bins.
+
+        fixed_chart : bool, optional (default: False)
+            Draw the distribution plots of all tensors with one DistributionPlot whose bar heights and KDE curves are
+            interpolated between tensors, instead of building a chart per tensor and morphing it with ReplacementTransform.
+            The chart has the largest bin count and one bar chart per batch of the largest batch size of the sequence;
+            when streaming, those of the first tensor (later tensors are histogrammed into its bins).
+
+        normalization : str, optional (default: "batch")
+            The value range the colours of the 3D matrices are normalised with: "batch" (the min / max of each cube),
+            "tensor" (per tensor) or "global" (one range for the whole sequence, so colours are comparable across tensors).
+            When streaming, "global" falls back to "tensor". The statistics behind it are computed once per tensor
+            (utils.stats) and also give the histogram layout and the distribution plots.
 
         Raises:
         ------
         AssertionError:
-            - If `tensors` is not a list.
+            - If `tensors` is not a list while `labels` are given.
+            - If `labels` is None and `tensors` doesn't yield (tensor, label) pairs.
             - If the lengths of `tensors` and `labels` are different.
-            - If `engine` is neither "matplotlib" nor "native".
+            - If `engine` is not one of "matplotlib", "native" or "projected".
 
         Notes:
         -----
         Using the matplotlib engine can save hours of rendering time compared to the native method.
         This function supports both OpenGL and Cairo renderers, and will adjust camera attributes accordingly.
+        Set TENSORSPEC_PROFILE=1 (or call utils.profiling.enable()) to time every stage of the construction; see
+        utils.profiling for the report and the Chrome trace.
 
         Examples:
         --------
@@ -65,54 +145,183 @@ class TensorVisualizationScene(ThreeDScene):
                 labels = [f"Random Tensor {i}" for i in range(len(tensors))]
                 super().construct(tensors=tensors, labels=labels, duration_each=0.8, duration_gap=1, engine="matplotlib")
         """
-        assert isinstance(tensors, list), f"tensors must be a list, got {type(tensors)}"
-        assert len(tensors) == len(labels), f"tensors and labels must have the same length, got {len(tensors)} / {len(labels)}"
-        assert engine in ["matplotlib", "native"], f"engine must be either 'matplotlib' or 'native', got {engine}"
+        streaming = labels is None
+        if streaming:
+
+            def read_pairs(items):
+                for item in items:
+                    # a plain tensor would be unpacked along its first dimension
+                    assert isinstance(item, (tuple, list)) and len(item) == 2, (
+                        f"with labels=None, tensors must yield (tensor, label) pairs, got {type(item).__name__}; "
+                        "pass labels to visualize a list of tensors"
+                    )
+                    yield as_tensor(item[0]), item[1]
+
+            frames = read_pairs(tensors)
+        else:
+            assert isinstance(tensors, list), f"tensors must be a list, got {type(tensors)}"
+            tensors = [as_tensor(tensor) for tensor in tensors]
+            assert len(tensors) == len(labels), f"tensors and labels differ in length: {len(tensors)} / {len(labels)}"
+        assert engine in ["matplotlib", "native", "projected"], f"engine must be matplotlib, native or projected, got {engine}"
+        assert lookahead >= 1, f"lookahead must be at least 1, got {lookahead}"
 
         match engine:
             case "matplotlib":
                 Matrix3D = Matrix3DMatplotlib
             case "native":
                 Matrix3D = Matrix3DNative
+            case "projected":
+                Matrix3D = Matrix3DProjected
+
+        if not streaming:
+            with profiling.timed("scene.lod"):
+                matrix_tensors = apply_lod(tensors, max_voxels_per_cube, max_voxels_per_scene, mode=pooling)
+            with profiling.timed("scene.stats"):
+                stats = sequence_stats(tensors)
+            layouts = histogram_layout(stats, range_mode, shared_range, num_bins=num_bins, max_bins=max_bins)
+            value_ranges = color_ranges(stats, normalization)
+            frames = zip(tensors, labels, matrix_tensors, layouts, stats, value_ranges)
+
+        chart = None
+        if fixed_chart and not streaming:
+            chart = self.make_chart(max(bins for _, bins in layouts), max(tensor.shape[0] for tensor in tensors))
+
+        matrix_kwargs = dict(matrix_kwargs or {})
+
+        output_fixed = engine != "matplotlib"
+
+        def fix_output(tensors):
+            """one output format and dpi for every matplotlib matrix, so that ReplacementTransform can morph them"""
+            nonlocal output_fixed
+            if not output_fixed:
+                output = matrix_kwargs.get("output", "auto")
+                raster_threshold = matrix_kwargs.get("raster_threshold", RASTER_THRESHOLD)
+                output, dpi = sequence_output(tensors, output, raster_threshold)
+                matrix_kwargs["output"], matrix_kwargs["dpi"] = output, matrix_kwargs.get("dpi") or dpi
+                output_fixed = True
 
-        num_tensors = len(tensors)
-        barplots = []
-        cubes = []
+        if not streaming:
+            fix_output(matrix_tensors)
+        if engine == "matplotlib" and workers != 1:
+            if streaming or matrix_kwargs.get("in_memory"):
+                matrix_kwargs["workers"] = workers  # nothing to prerender from / into; each matrix fans out its own batches
+            else:
+                prerender_keys = ("cache_dir", "max_cache_bytes", "output", "raster_threshold", "dpi")
+                cache_kwargs = {k: v for k, v in matrix_kwargs.items() if k in prerender_keys}
+                with profiling.timed("scene.prerender", workers=workers):
+                    Matrix3DMatplotlib.prerender(matrix_tensors, workers=workers, value_ranges=value_ranges, **cache_kwargs)
 
-        for tensor in tensors:
-            # -------- create the distribution plot --------
+        # -------- frames are built just ahead of their transition; at most lookahead + 1 are alive at once --------
+        window = deque()
+
+        def fill_window():
+            nonlocal chart
+            while len(window) < lookahead + 1:
+                frame = next(frames, None)
+                if frame is None:
+                    return
+                if streaming:
+                    tensor, label = frame
+                    # the scene budget is shared by the frames that are alive at the same time
+                    scene_budget = None if max_voxels_per_scene is None else max_voxels_per_scene // (lookahead + 1)
+                    with profiling.timed("scene.lod"):
+                        (matrix_tensor,) = apply_lod([tensor], max_voxels_per_cube, scene_budget, mode=pooling)
+                    with profiling.timed("scene.stats"):
+                        stats = sequence_stats([tensor])
+                    (layout,) = histogram_layout(stats, range_mode, shared=False, num_bins=num_bins, max_bins=max_bins)
+                    (value_range,) = color_ranges(stats, "tensor" if normalization == "global" else normalization)
+                    (tensor_stats,) = stats
+                    fix_output([matrix_tensor])  # the first tensor decides for the whole stream
+                else:
+                    tensor, label, matrix_tensor, layout, tensor_stats, value_range = frame
+                if fixed_chart and chart is None:  # streaming: sized by the first tensor
+                    chart = self.make_chart(layout[1], tensor.shape[0])
+                bar_group, cube_group = self.make_frame(
+                    tensor, matrix_tensor, layout, Matrix3D, matrix_kwargs, chart, tensor_stats, value_range
+                )
+                window.append((label, bar_group, cube_group))
+
+        def make_label(index, position):
+            """the progress bar of the index-th tensor, found at window[position]"""
+            if streaming:  # the labels ahead are the only ones known
+                window_labels = [label for label, _, _ in window][position:]
+                return make_progress_bar(window_labels, selected_idx=0).to_edge(UP, buff=0.1)
+            return make_progress_bar(labels, selected_idx=index).to_edge(UP, buff=0.1)
+
+        # -------- tensors --------
+        fill_window()
+        assert window, "no tensors to visualize"
+        progress_bar = make_label(0, 0)
+        _, bar_group, cube_group = window[0]
+        self.add(bar_group if chart is None else chart, cube_group, progress_bar)  # with a chart, bar_group is a frame index
+
+        index = 0
+        while len(window) > 1:
+            index += 1
+            (_, bar_group, cube_group), (_, next_bar_group, next_cube_group) = window[0], window[1]
+            next_progress_bar = make_label(index, 1)
+            if chart is None:
+                bar_transition = ReplacementTransform(bar_group, next_bar_group)
+            else:  # next_bar_group is the frame index of the next tensor in the chart
+                bar_transition = chart.tracker.animate.set_value(next_bar_group)
+            with profiling.timed("scene.play", index=index):  # interpolating and rasterizing the frames of the transition
+                self.play(
+                    bar_transition,
+                    ReplacementTransform(cube_group, next_cube_group),
+                    ReplacementTransform(progress_bar, next_progress_bar),
+                    run_time=duration_each,
+                )
+            progress_bar = next_progress_bar
+            window.popleft()
+            fill_window()
+            with profiling.timed("scene.wait"):
+                self.wait(duration_gap)
+        self.wait()
+
+    def make_chart(self, num_bins, num_batches):
+        """The DistributionPlot shared by all tensors, placed on the right half of the frame."""
+        chart = (
+            DistributionPlot(num_bins=num_bins, num_batches=num_batches, use_opengl_renderer=self.use_opengl)
+            .move_to(ORIGIN)
+            .shift(RIGHT * self.get_camera_width() * 0.25)
+        )
+        return self.scale_to_fit_camera(chart, width_ratio=0.36, height_ratio=0.8)
+
+    @profiling.profiled("scene.make_frame")
+    def make_frame(self, tensor, matrix_tensor, layout, Matrix3D, matrix_kwargs, chart=None, stats=None, value_range=None):
+        """
+        The distribution plot and the 3D matrix of one tensor, placed on the right and left half of the frame.
+        With a chart, the tensor is added to it and its frame index is returned instead of a distribution plot.
+        stats are the tensor's TensorStats and value_range the colour range of its matrix.
+        """
+        # -------- create the distribution plot --------
+        hist_range, num_bins = layout
+        if chart is not None:
+            bar_group = chart.add_frame(tensor, hist_range, stats=stats)
+        else:
             bar_group = (
-                create_distribution_plot(tensor, use_opengl_renderer=self.use_opengl)
+                create_distribution_plot(
+                    tensor, num_bins=num_bins, use_opengl_renderer=self.use_opengl, value_range=hist_range, stats=stats
+                )
                 .move_to(ORIGIN)
                 .shift(RIGHT * self.get_camera_width() * 0.25)
             )
             bar_group = self.scale_to_fit_camera(bar_group, width_ratio=0.36, height_ratio=0.8)
-            barplots.append(bar_group)
-
-            # -------- create the 3D matrix --------
-            cube_group = (
-                Matrix3D(tensor, use_opengl_renderer=self.use_opengl)
-                .move_to(ORIGIN)
-                .shift(LEFT * self.get_camera_width() * 0.25)
-            )
-            cube_group = self.scale_to_fit_camera(cube_group, width_ratio=0.36, height_ratio=0.8)
-            cubes.append(cube_group)
-
-        # -------- labels --------
-        labels = [make_progress_bar(labels, selected_idx=i).to_edge(UP, buff=0.1) for i in range(num_tensors)]
 
-        # -------- tensors --------
-        self.add(barplots[0], cubes[0], labels[0])
-
-        for i in range(num_tensors - 1):
-            self.play(
-                ReplacementTransform(barplots[i], barplots[i + 1]),
-                ReplacementTransform(cubes[i], cubes[i + 1]),
-                ReplacementTransform(labels[i], labels[i + 1]),
-                run_time=duration_each,
+        # -------- create the 3D matrix --------
+        cube_group = (
+            Matrix3D(
+                matrix_tensor,
+                use_opengl_renderer=self.use_opengl,
+                true_shape=tensor.shape,
+                value_range=value_range,
+                **matrix_kwargs,
             )
-            self.wait(duration_gap)
-        self.wait()
+            .move_to(ORIGIN)
+            .shift(LEFT * self.get_camera_width() * 0.25)
+        )
+        cube_group = self.scale_to_fit_camera(cube_group, width_ratio=0.36, height_ratio=0.8)
+        return bar_group, cube_group
 
     # -------- renderer specific camera setting --------
     def scale_to_fit_camera(self, mobject, width_ratio=0.5, height_ratio=0.5):
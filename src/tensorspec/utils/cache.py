@@ -0,0 +1,88 @@
+"""
+Content-addressed disk cache for rendered files (e.g. the matplotlib voxel svgs).
+Entries are named by a hash of the data and of every parameter that affects the output, so identical inputs are never rendered twice;
+the least recently used entries are evicted once the cache grows past its size limit.
+"""
+
+from pathlib import Path
+from uuid import uuid4
+import hashlib
+import os
+import numpy as np
+
+
+def content_key(array, **params):
+    """
+    Hashes an array together with keyword parameters into a hex digest.
+    Parameters:
+        - array (numpy.ndarray): The data; its dtype and shape are part of the key.
+        - **params: Any parameters that change the rendered output (colormap, view angle, library versions...).
+    """
+    array = np.ascontiguousarray(array)
+    digest = hashlib.sha1()
+    digest.update(f"{array.dtype}{array.shape}".encode())
+    digest.update(array.tobytes())
+    for name in sorted(params):
+        digest.update(f"{name}={params[name]!r};".encode())
+    return digest.hexdigest()
+
+
+class DiskCache:
+    def __init__(self, directory, max_bytes=512 * 2**20, prefix="", suffix=""):
+        """
+        Parameters:
+            - directory (Path or str): Where the cached files live; created if missing.
+            - max_bytes (int, optional): Size limit of the cache, enforced by evict(). Default is 512MB.
+            - prefix / suffix (str, optional): Added around the key to form the file name, e.g. "3d_plot_" and ".svg".
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.prefix, self.suffix = prefix, suffix
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key):
+        return self.directory / f"{self.prefix}{key}{self.suffix}"
+
+    def get(self, key):
+        """Returns the path of a cached entry (marking it as recently used) or None on a miss."""
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, render):
+        """
+        Renders a new entry; render(path) must write the file at the given path.
+        The file is written under a temporary name and moved in place, so concurrent renders never see partial files.
+        """
+        path = self.path(key)
+        temp_path = self.directory / f".{uuid4().hex}{self.suffix}"
+        try:
+            render(temp_path)
+            os.replace(temp_path, path)
+        finally:
+            temp_path.unlink(missing_ok=True)
+        return path
+
+    def fetch(self, key, render):
+        """get() on a hit, put() on a miss."""
+        return self.get(key) or self.put(key, render)
+
+    def evict(self):
+        """Removes the least recently used entries until the cache fits into max_bytes."""
+        entries = []
+        for path in self.directory.glob(f"{self.prefix}*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # removed by another process in the meantime
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
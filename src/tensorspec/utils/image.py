@@ -7,12 +7,23 @@
 4. trim the image to the content edges, leaving a 10px margin
 5. save the trimmed image to a new file (also user defined)
 test on media/images/Example.png
+
+load_image_channels: the decoded, resized channels of an image, cached per process (least recently used first out) and optionally on disk
 """
 
+from collections import OrderedDict
 from pathlib import Path
+import hashlib
 
 from PIL import Image
 import numpy as np
+from src.tensorspec.utils.cache import DiskCache
+from src.tensorspec.utils import profiling
+
+IMAGE_CHANNELS = (
+    OrderedDict()
+)  # (content hash, mtime, size, channels) -> read-only (channels, rows, cols) uint8 array; LRU order
+FILE_DIGESTS = {}  # (path, mtime, file size) -> content hash; files are only read again once they change
 
 
 def detect_background_color(image_path):
@@ -46,6 +57,63 @@ def trim_image(input_path, output_path):
         trimmed_img.save(output_path)
 
 
+def file_digest(path):
+    """sha1 of the file's content, memoised per path, modification time and size."""
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    if key not in FILE_DIGESTS:
+        digest = hashlib.sha1()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(2**20), b""):
+                digest.update(block)
+        FILE_DIGESTS[key] = digest.hexdigest()
+    return FILE_DIGESTS[key], stat.st_mtime_ns
+
+
+def decode_image_channels(image_path, size, channels):
+    """The image as RGB, resized to size (width, height) by PIL, its channels repeated cyclically up to channels."""
+    with Image.open(image_path) as image:
+        rgb = np.array(image.convert("RGB").resize(size))
+    return np.stack([rgb[:, :, i % 3] for i in range(channels)])
+
+
+def load_image_channels(
+    image_path, size, channels=3, cache_dir=None, max_cache_bytes=512 * 2**20, max_memory_bytes=256 * 2**20
+):
+    """
+    The (channels, rows, cols) uint8 channels of an image, decoded and resized once per process: later calls get the same
+    read-only array, as long as it is among the most recently used ones that fit into max_memory_bytes.
+    With cache_dir the arrays are also kept as .npy files, so other processes and runs skip PIL too.
+    Parameters:
+        - image_path (Path): The image.
+        - size (tuple): The (width, height) the image is resized to, as passed to PIL.
+        - channels (int, optional): The number of channels returned; R, G and B are repeated cyclically. Default is 3.
+        - cache_dir (Path or str, optional): The directory of the disk cache; None keeps the arrays in memory only.
+        - max_cache_bytes (int, optional): The least recently used arrays are evicted once the disk cache grows past this size.
+        - max_memory_bytes (int, optional): The same for the arrays kept in memory; the last one is always kept.
+    """
+    digest, mtime = file_digest(Path(image_path))
+    key = (digest, mtime, tuple(size), channels)
+    if key in IMAGE_CHANNELS:
+        profiling.count("image_channels.hit")
+        IMAGE_CHANNELS.move_to_end(key)
+        return IMAGE_CHANNELS[key]
+
+    profiling.count("image_channels.miss")
+    if cache_dir is None:
+        array = decode_image_channels(image_path, size, channels)
+    else:
+        cache = DiskCache(cache_dir, max_cache_bytes, prefix="image_channels_", suffix=".npy")
+        name = hashlib.sha1(repr(key).encode()).hexdigest()
+        array = np.load(cache.fetch(name, lambda path: np.save(path, decode_image_channels(image_path, size, channels))))
+        cache.evict()
+    array.setflags(write=False)  # shared by every caller
+    IMAGE_CHANNELS[key] = array
+    while len(IMAGE_CHANNELS) > 1 and sum(cached.nbytes for cached in IMAGE_CHANNELS.values()) > max_memory_bytes:
+        IMAGE_CHANNELS.popitem(last=False)
+    return array
+
+
 if __name__ == "__main__":
     # input_image = Path("media/images/Example.png")
     input_image = Path("/Users/donyin/Desktop/inverted_flex_scheme.png")
@@ -0,0 +1,36 @@
+"""
+In-process memo of text mobjects (Tex, MathTex, Text, MarkupText...): LaTeX / Pango and the svg parsing run once per unique label,
+every further request gets a copy of the first mobject. Scenes with many identical nodes or matrices ("3x3 conv, 64", "Latent"...)
+only pay for the first one.
+"""
+
+from manim import config
+from src.tensorspec.utils import profiling
+
+LABELS = {}  # (class, text, renderer, keyword arguments) -> the mobject copies are made from
+
+
+def label_key(cls, text, kwargs):
+    # repr: colours and fonts are not always hashable; the renderer decides between the cairo and the opengl mobject classes
+    return (cls, text, config.renderer, tuple(sorted((name, repr(value)) for name, value in kwargs.items())))
+
+
+def cached_label(cls, text, **kwargs):
+    """
+    A copy of cls(text, **kwargs), built only the first time the same label is asked for in this process.
+    Parameters:
+        - cls (type): The mobject class, e.g. Tex or Text.
+        - text (str): The string of the label.
+        - **kwargs: Keyword arguments of cls (color, font, font_size...); they are part of the key.
+    """
+    key = label_key(cls, text, kwargs)
+    if key not in LABELS:
+        profiling.count("labels.miss")
+        LABELS[key] = cls(text, **kwargs)
+    else:
+        profiling.count("labels.hit")
+    return LABELS[key].copy()
+
+
+def clear_labels():
+    LABELS.clear()
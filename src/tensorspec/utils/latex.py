@@ -0,0 +1,146 @@
+"""
+Batch LaTeX compilation: every Tex / MathTex label a scene graph will need is typeset in one multi-page document, compiled with
+one latex and one dvisvgm run, and each page is stored as the svg manim's tex_to_svg_file looks for. The constructors (NetNode,
+FlatMatrix3D, bounding_moject, the VAEs...) then find their svg cached and skip the two subprocesses they would launch per label.
+
+Labels are described like the arguments of utils.labels.cached_label: (cls, text, kwargs) tuples, see the tex_strings() helpers.
+e.g.
+    precompile_tex([*MM_VAE.tex_strings(font_size=24), *NetNode.tex_strings(text="Model", text_color=BLACK)])
+    mm_vae = MM_VAE(font_size=24)  # no latex run left
+"""
+
+from contextlib import contextmanager
+from manim import config, logger, Tex
+from manim.mobject.text import tex_mobject
+from manim.mobject.text.tex_mobject import SingleStringMathTex
+from manim.utils.tex_file_writing import compile_tex, delete_nonsvg_files, generate_tex_file, tex_hash
+from src.tensorspec.utils import profiling
+import subprocess
+import os
+import re
+
+DOCUMENT_CLASS = r"\documentclass[preview]{standalone}"  # of manim's default template; a page per label is only made from it
+BATCH_PREAMBLE = "\\documentclass{article}\n\\usepackage[active,tightpage]{preview}"  # standalone[preview] without the wrapping
+
+
+class TexRequest(Exception):
+    """Raised by the dry run in place of compiling: carries what Tex would have passed to tex_to_svg_file."""
+
+    def __init__(self, expression, environment, tex_template):
+        super().__init__(expression)
+        self.expression, self.environment, self.tex_template = expression, environment, tex_template
+
+
+def tex_label(text, **kwargs):
+    """The (cls, text, kwargs) description of cached_label(Tex, text, **kwargs)."""
+    return (Tex, text, kwargs)
+
+
+@contextmanager
+def intercepted_tex():
+    """Within the block, manim's tex_to_svg_file raises a TexRequest instead of compiling; restored on exit, even on errors."""
+
+    def intercept(expression, environment=None, tex_template=None):
+        raise TexRequest(expression, environment, tex_template or config["tex_template"])
+
+    compile_svg = tex_mobject.tex_to_svg_file
+    tex_mobject.tex_to_svg_file = intercept
+    try:
+        yield
+    finally:
+        tex_mobject.tex_to_svg_file = compile_svg
+
+
+def tex_request(cls, text, kwargs):
+    """(expression, environment, template) of a label, i.e. exactly what its constructor will typeset, without running latex."""
+    with intercepted_tex():
+        try:
+            cls(text, **kwargs)
+        except TexRequest as request:
+            return request.expression, request.environment, request.tex_template
+    return None  # the class never reached latex, e.g. an empty MathTex
+
+
+def document_body(tex_file):
+    """What the template puts between \\begin{document} and \\end{document}."""
+    code = tex_file.read_text(encoding="utf-8")
+    return code[code.index(r"\begin{document}") + len(r"\begin{document}") : code.rindex(r"\end{document}")]
+
+
+def split_pages(dvi_file, output_format, num_pages):
+    """Converts every page of dvi_file with one dvisvgm run; returns the svg of each page in order, or None if pages are missing."""
+    pattern = dvi_file.with_name(f"{dvi_file.stem}-%p.svg")
+    command = [
+        "dvisvgm",
+        *(["--pdf"] if output_format == ".pdf" else []),
+        "--page=1-",
+        "--no-fonts",
+        "--verbosity=0",
+        f"--output={pattern.as_posix()}",
+        dvi_file.as_posix(),
+    ]
+    subprocess.run(command, stdout=subprocess.DEVNULL)
+    # dvisvgm pads %p with zeros depending on its version and the page count; the number is read back instead
+    pages = {int(re.search(r"-(\d+)$", svg.stem).group(1)): svg for svg in dvi_file.parent.glob(f"{dvi_file.stem}-*.svg")}
+    if sorted(pages) != list(range(1, num_pages + 1)):
+        return None
+    return [pages[page] for page in range(1, num_pages + 1)]
+
+
+def compile_batch(tex_files, tex_template):
+    """Typesets tex_files (made by generate_tex_file with tex_template) as the pages of one document; True on success."""
+    preamble = tex_template.body[: tex_template.body.index(r"\begin{document}")].replace(DOCUMENT_CLASS, BATCH_PREAMBLE, 1)
+    pages = "".join(f"\\begin{{preview}}{document_body(tex_file)}\\end{{preview}}\n" for tex_file in tex_files)
+    code = f"{preamble}\\begin{{document}}\n{pages}\\end{{document}}\n"
+
+    batch_file = config.get_dir("tex_dir") / f"batch_{tex_hash(code)}.tex"
+    batch_file.write_text(code, encoding="utf-8")
+    try:
+        dvi_file = compile_tex(batch_file, tex_template.tex_compiler, tex_template.output_format)
+    except ValueError:
+        return False  # e.g. one bad label; it raises again, with its own log, when its constructor compiles it alone
+    svg_files = split_pages(dvi_file, tex_template.output_format, len(tex_files))
+    if svg_files is None:
+        return False  # a label spilled over several pages; every label is compiled on its own
+    for tex_file, svg_file in zip(tex_files, svg_files):
+        os.replace(svg_file, tex_file.with_suffix(".svg"))
+    return True
+
+
+@profiling.profiled("tex.precompile")
+def precompile_tex(labels):
+    """
+    Compiles the svg of every Tex / MathTex label that isn't cached yet, one latex and one dvisvgm run per template.
+    Labels that can't be batched (other classes, custom document classes, a failed batch) are left to their constructors.
+    Parameters:
+        - labels (iterable): (cls, text, kwargs) tuples, as passed to cached_label; other classes (Text...) are skipped.
+    Returns:
+        - int: The number of labels compiled by the batch.
+    """
+    batches = {}  # template code -> (template, tex files)
+    for cls, text, kwargs in labels:
+        if not issubclass(cls, SingleStringMathTex):
+            continue
+        request = tex_request(cls, text, kwargs)
+        if request is None:
+            continue
+        expression, environment, tex_template = request
+        tex_file = generate_tex_file(expression, environment, tex_template)
+        if tex_file.with_suffix(".svg").exists() or DOCUMENT_CLASS not in tex_template.body:
+            continue
+        key = (tex_template.body, str(tex_template.tex_compiler), tex_template.output_format)
+        template, tex_files = batches.setdefault(key, (tex_template, []))
+        if tex_file not in tex_files:
+            tex_files.append(tex_file)
+
+    compiled = 0
+    for template, tex_files in batches.values():
+        with profiling.timed("tex.batch", labels=len(tex_files)):
+            if compile_batch(tex_files, template):
+                compiled += len(tex_files)
+            else:
+                logger.info(f"batch LaTeX compilation of {len(tex_files)} labels failed, they are compiled one by one")
+    if compiled and not config["no_latex_cleanup"]:
+        delete_nonsvg_files()
+    profiling.count("tex.precompiled", compiled)
+    return compiled
@@ -0,0 +1,95 @@
+"""
+Loads tensors from .npy, .safetensors and .pt files as memory maps, so dumps larger than RAM can be visualised:
+nothing is read until a chunk of the tensor is used, and the statistics / level of detail passes only read CHUNK_SIZE elements at a time.
+"""
+
+from pathlib import Path
+import warnings
+import struct
+import json
+import numpy as np
+import torch
+
+CHUNK_SIZE = 2**24  # elements read (and converted to float32) at once by the chunked passes
+
+SAFETENSORS_DTYPES = {
+    "F64": np.float64,
+    "F32": np.float32,
+    "F16": np.float16,
+    "BF16": np.uint16,  # no numpy bfloat16; the bits are mapped as uint16 and viewed as torch.bfloat16
+    "I64": np.int64,
+    "I32": np.int32,
+    "I16": np.int16,
+    "I8": np.int8,
+    "U8": np.uint8,
+    "BOOL": np.bool_,
+}
+
+
+def from_memmap(array):
+    """A torch tensor sharing the memory of a (read-only) numpy memmap; torch warns that it can't be written to, it is never written to."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        return torch.from_numpy(array)
+
+
+def safetensors_memmap(path):
+    """Memory maps every tensor of a .safetensors file: {name: torch.Tensor}, read straight from the file's header, no copy."""
+    with open(path, "rb") as file:
+        (header_size,) = struct.unpack("<Q", file.read(8))
+        header = json.loads(file.read(header_size))
+    header.pop("__metadata__", None)
+
+    tensors = {}
+    for name, info in header.items():
+        assert info["dtype"] in SAFETENSORS_DTYPES, f"unsupported safetensors dtype {info['dtype']} of {name}"
+        start, end = info["data_offsets"]
+        dtype = np.dtype(SAFETENSORS_DTYPES[info["dtype"]])
+        array = np.memmap(path, dtype=dtype, mode="r", offset=8 + header_size + start, shape=((end - start) // dtype.itemsize,))
+        tensor = from_memmap(array)
+        if info["dtype"] == "BF16":
+            tensor = tensor.view(torch.bfloat16)
+        tensors[name] = tensor.view(info["shape"])
+    return tensors
+
+
+def load_tensor(path, key=None):
+    """
+    Loads a tensor without reading it into memory.
+    Parameters:
+        - path (Path or str): A .npy, .safetensors or .pt / .pth file.
+        - key (str, optional): The tensor to load from a file holding several (safetensors, or a dict saved with torch.save);
+          can be omitted when the file holds a single tensor.
+    Returns:
+        - torch.Tensor: Backed by a memory map of the file.
+    """
+    path = Path(path)
+    match path.suffix:
+        case ".npy":
+            return from_memmap(np.load(path, mmap_mode="r"))
+        case ".safetensors":
+            tensors = safetensors_memmap(path)
+        case ".pt" | ".pth":
+            tensors = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+            if isinstance(tensors, torch.Tensor):
+                return tensors
+        case _:
+            raise ValueError(f"unsupported file type {path.suffix}, expected .npy, .safetensors or .pt")
+
+    if key is None:
+        assert len(tensors) == 1, f"{path.name} holds {len(tensors)} tensors, pick one with key: {list(tensors)}"
+        (key,) = tensors
+    return tensors[key]
+
+
+def as_tensor(source):
+    """A tensor as it is, or load_tensor of a path."""
+    return load_tensor(source) if isinstance(source, (str, Path)) else source
+
+
+def iter_chunks(tensor, chunk_size=CHUNK_SIZE):
+    """Yields (batch index, float32 chunk) over the flattened batches of a (batch, ...) tensor; only one chunk is in memory at once."""
+    for index in range(tensor.shape[0]):
+        flat = tensor[index].reshape(-1)
+        for start in range(0, flat.numel(), chunk_size):
+            yield index, flat[start : start + chunk_size].float()
@@ -0,0 +1,111 @@
+"""
+Level of detail for large tensors: pools each (c, h, w) batch of a (batch, c, h, w) tensor into a bounded number of voxels,
+so production size activations can be drawn with bounded memory and render time.
+"""
+
+from torch.nn import functional as F
+import numpy as np
+import torch
+from src.tensorspec.utils.loaders import CHUNK_SIZE
+
+POOLING_MODES = ["mean", "max", "absmax"]
+
+
+def lod_shape(shape, max_voxels):
+    """
+    The largest grid no bigger than shape with at most max_voxels elements; all axes shrink by about the same factor,
+    axes that would shrink below one voxel are kept at one and leave their share of the budget to the others.
+    """
+    shape = np.array(shape, dtype=float)
+    if np.prod(shape) <= max_voxels:
+        return tuple(int(i) for i in shape)
+
+    target, fixed = shape.copy(), np.zeros(len(shape), dtype=bool)
+    for _ in range(len(shape)):
+        scale = (max_voxels / np.prod(target[fixed]) / np.prod(shape[~fixed])) ** (1 / (~fixed).sum())
+        target[~fixed] = shape[~fixed] * scale
+        too_small = ~fixed & (target < 1)
+        if not too_small.any():
+            break
+        target[too_small], fixed = 1, fixed | too_small
+    return tuple(int(i) for i in np.maximum(np.floor(target), 1))
+
+
+def pool_tensor(tensor, shape, mode="mean"):
+    """
+    Adaptively pools a (batch, c, h, w) tensor to (batch, *shape).
+    Parameters:
+        - tensor (torch.Tensor): The tensor to pool.
+        - shape (tuple): The target (c, h, w).
+        - mode (str, optional): "mean", "max" or "absmax" (the signed value with the largest magnitude). Default is "mean".
+    """
+    assert mode in POOLING_MODES, f"mode must be one of {POOLING_MODES}, got {mode}"
+    volume = tensor.float().unsqueeze(1)  # (batch, 1, c, h, w); pool3d treats c, h, w as the spatial axes
+    match mode:
+        case "mean":
+            pooled = F.adaptive_avg_pool3d(volume, shape)
+        case "max":
+            pooled = F.adaptive_max_pool3d(volume, shape)
+        case "absmax":
+            _, indices = F.adaptive_max_pool3d(volume.abs(), shape, return_indices=True)
+            pooled = volume.flatten(2).gather(2, indices.flatten(2)).view_as(indices)
+    return pooled.squeeze(1)
+
+
+def pool_tensor_chunked(tensor, shape, mode="mean", chunk_size=CHUNK_SIZE):
+    """
+    pool_tensor reading at most chunk_size elements at once (or one column of a pooling window, if that is larger), so a
+    memory mapped tensor (utils.loaders) is never read into memory at once. Gives the same result as pool_tensor: the pooling
+    windows are products of one window per axis, and mean, max and absmax can be taken one axis after the other.
+    For every batch, output channel and output row, the (channel, row) window is reduced chunk of columns by chunk of columns
+    into one row, which is then pooled along w.
+    """
+    batches, (channels, height, width) = tensor.shape[0], tensor.shape[1:]
+    pooled = torch.empty(batches, *shape)
+    for b in range(batches):
+        for i in range(shape[0]):
+            # the window of adaptive pooling: [floor(i * C / c), ceil((i + 1) * C / c))
+            c0, c1 = i * channels // shape[0], -(-(i + 1) * channels // shape[0])
+            for j in range(shape[1]):
+                h0, h1 = j * height // shape[1], -(-(j + 1) * height // shape[1])
+                step = max(chunk_size // ((c1 - c0) * (h1 - h0)), 1)
+                row = torch.empty(1, 1, 1, width)
+                for w0 in range(0, width, step):
+                    window = tensor[b, c0:c1, h0:h1, w0 : w0 + step].unsqueeze(0)
+                    row[..., w0 : w0 + step] = pool_tensor(window, (1, 1, window.shape[-1]), mode)
+                pooled[b, i, j] = pool_tensor(row, (1, 1, shape[2]), mode)[0, 0, 0]
+    return pooled
+
+
+def pool_to_budget(tensor, max_voxels, mode="mean", chunk_size=CHUNK_SIZE):
+    """
+    Pools every batch of a (batch, c, h, w) tensor down to at most max_voxels voxels; tensors within the budget are returned as they are.
+    Tensors larger than chunk_size elements are pooled chunk_size elements at a time (pool_tensor_chunked).
+    """
+    shape = lod_shape(tensor.shape[1:], max_voxels)
+    if shape == tuple(tensor.shape[1:]):
+        return tensor
+    if tensor.numel() > chunk_size:
+        return pool_tensor_chunked(tensor, shape, mode, chunk_size)
+    return pool_tensor(tensor, shape, mode)
+
+
+def voxel_budget(tensors, max_voxels_per_cube=None, max_voxels_per_scene=None):
+    """
+    The number of voxels each cube (one batch of one tensor) may use so that both limits hold; None when there is no limit.
+    The scene budget is split evenly between all cubes of all tensors.
+    """
+    budgets = [max_voxels_per_cube]
+    if max_voxels_per_scene is not None:
+        budgets.append(max(1, max_voxels_per_scene // sum(tensor.shape[0] for tensor in tensors)))
+    budgets = [budget for budget in budgets if budget is not None]
+    return min(budgets) if budgets else None
+
+
+def apply_lod(tensors, max_voxels_per_cube=None, max_voxels_per_scene=None, mode="mean"):
+    """Pools a list of (batch, c, h, w) tensors to the voxel budget; returns the pooled tensors (the inputs if there is no budget)."""
+    budget = voxel_budget(tensors, max_voxels_per_cube, max_voxels_per_scene)
+    if budget is None:
+        return tensors
+    with torch.no_grad():
+        return [pool_to_budget(tensor, budget, mode) for tensor in tensors]
@@ -0,0 +1,130 @@
+"""
+Per-stage timers and counters showing where scene construction spends its time (plotting, svg parsing, Tex, KDE, rendering...).
+Disabled by default; enable() (or the TENSORSPEC_PROFILE environment variable) turns them on. While disabled, timed() returns
+one shared no-op context manager and count() returns at once, so the hooks left in the code cost one function call.
+
+e.g.
+    profiling.enable()
+    scene.render()
+    profiling.print_report()
+    profiling.write_chrome_trace("trace.json")  # open in chrome://tracing or https://ui.perfetto.dev
+"""
+
+from contextlib import nullcontext
+from collections import defaultdict
+from functools import wraps
+from pathlib import Path
+import threading
+import json
+import time
+import os
+
+ENABLED = bool(os.environ.get("TENSORSPEC_PROFILE"))
+NULL_TIMER = nullcontext()
+
+events = []  # (name, start, duration, thread id, args) of every finished timer; seconds since the first one
+counters = defaultdict(int)
+origin = time.perf_counter()
+
+
+def enable(reset_records=True):
+    global ENABLED
+    ENABLED = True
+    if reset_records:
+        reset()
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    global origin
+    events.clear()
+    counters.clear()
+    origin = time.perf_counter()
+
+
+class Timer:
+    def __init__(self, name, args):
+        self.name, self.args = name, args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        events.append((self.name, self.start - origin, end - self.start, threading.get_ident(), self.args))
+
+
+def timed(name, **args):
+    """
+    A context manager timing the block under name; timers can be nested.
+    Parameters:
+        - name (str): The stage, e.g. "matplotlib.plot_channel"; stages with the same name are summed in the report.
+        - **args: Details shown with the event in the chrome trace, e.g. the shape of the tensor.
+    """
+    if not ENABLED:
+        return NULL_TIMER
+    return Timer(name, args)
+
+
+def profiled(name):
+    """Decorator timing every call of a function (or method) under name, like a timed() block around its body."""
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return function(*args, **kwargs)
+            with Timer(name, {}):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def count(name, value=1):
+    """Adds value to the counter name, e.g. cache hits."""
+    if ENABLED:
+        counters[name] += value
+
+
+def report():
+    """{"timers": {name: {calls, total, mean, max}}, "counters": {name: value}}, timers sorted by total time."""
+    timers = defaultdict(list)
+    for name, _, duration, _, _ in events:
+        timers[name].append(duration)
+    timers = {
+        name: {"calls": len(durations), "total": sum(durations), "mean": sum(durations) / len(durations), "max": max(durations)}
+        for name, durations in sorted(timers.items(), key=lambda item: -sum(item[1]))
+    }
+    return {"timers": timers, "counters": dict(counters)}
+
+
+def print_report():
+    summary = report()
+    print(f"{'stage':<40} {'calls':>8} {'total (s)':>12} {'mean (ms)':>12} {'max (ms)':>12}")
+    for name, stats in summary["timers"].items():
+        total, mean, longest = stats["total"], stats["mean"] * 1e3, stats["max"] * 1e3
+        print(f"{name:<40} {stats['calls']:>8} {total:>12.3f} {mean:>12.2f} {longest:>12.2f}")
+    for name, value in summary["counters"].items():
+        print(f"{name:<40} {value:>8}")
+
+
+def write_report(path):
+    Path(path).write_text(json.dumps(report(), indent=2))
+
+
+def write_chrome_trace(path):
+    """Writes the timers as complete ("X") events and the counters as metadata in the Chrome trace event format."""
+    pid = os.getpid()
+    trace = []
+    for name, start, duration, tid, args in events:
+        details = {key: str(value) for key, value in args.items()}
+        event = {"name": name, "ph": "X", "ts": start * 1e6, "dur": duration * 1e6, "pid": pid, "tid": tid, "args": details}
+        trace.append(event)
+    Path(path).write_text(json.dumps({"traceEvents": trace, "otherData": dict(counters)}))
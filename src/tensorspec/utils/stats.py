@@ -0,0 +1,126 @@
+"""
+One statistics pass over a sequence of (batch, c, h, w) tensors, made with torch reductions and shared by every stage of a scene:
+the histogram layout, the distribution plots (histograms, KDE bandwidths, min / max labels) and the colour scale of the 3D matrices.
+The passes read the tensors in chunks, so they also work on memory mapped tensors that don't fit into memory.
+"""
+
+import numpy as np
+import torch
+from src.tensorspec.utils.loaders import CHUNK_SIZE, iter_chunks
+
+NORMALIZATION_MODES = ["global", "tensor", "batch"]
+QUANTILE_BINS = 2**16  # resolution of the quantiles of tensors larger than a chunk
+
+
+class TensorStats:
+    def __init__(self, tensor, percentiles=(1, 99), chunk_size=CHUNK_SIZE):
+        """
+        Summary statistics of a (batch, c, h, w) tensor: of the whole tensor and of each batch.
+        Computed in chunks of chunk_size elements, so memory mapped tensors (utils.loaders) are never read into memory at once.
+        Parameters:
+            - tensor (torch.Tensor): The tensor; kept to compute histograms on demand.
+            - percentiles (tuple, optional): The lower and upper percentile kept next to the quartiles. Default is (1, 99).
+            - chunk_size (int, optional): The number of elements read at once. Default is CHUNK_SIZE.
+        """
+        assert tensor.dim() == 4, f"The tensor must be 4-dimensional (batch, c, h, w) got {tensor.dim()}"
+        self.tensor = tensor
+        self.count = tensor.numel()
+        self.chunk_size = chunk_size
+        self.histograms = {}  # (min, max, bins) -> (batch, bins) counts
+
+        # -------- min, max, mean and variance of each batch; chunks are merged with Chan's parallel variance update --------
+        num_batches = tensor.shape[0]
+        self.batch_min, self.batch_max = np.full(num_batches, np.inf), np.full(num_batches, -np.inf)
+        counts, means, m2 = np.zeros(num_batches), np.zeros(num_batches), np.zeros(num_batches)
+        with torch.no_grad():
+            for index, chunk in iter_chunks(tensor, chunk_size):
+                chunk_min, chunk_max = torch.aminmax(chunk)
+                self.batch_min[index] = min(self.batch_min[index], float(chunk_min))
+                self.batch_max[index] = max(self.batch_max[index], float(chunk_max))
+                n, mean = chunk.numel(), float(chunk.double().mean())
+                chunk_m2 = float(((chunk.double() - mean) ** 2).sum())
+                total = counts[index] + n
+                delta = mean - means[index]
+                m2[index] += chunk_m2 + delta**2 * counts[index] * n / total
+                means[index] += delta * n / total
+                counts[index] = total
+
+        self.batch_mean = means
+        self.batch_std = np.sqrt(m2 / np.maximum(counts - 1, 1))  # ddof = 1, like np.std(ddof=1)
+        self.mean = float((means * counts).sum() / counts.sum())
+        self.std = float(np.sqrt((m2.sum() + (counts * (means - self.mean) ** 2).sum()) / max(self.count - 1, 1)))
+        self.min, self.max = float(self.batch_min.min()), float(self.batch_max.max())
+
+        # -------- quantiles: exact from one sort when the tensor fits into a chunk, else from a fine histogram --------
+        quantiles = np.array([0, percentiles[0], 25, 75, percentiles[1], 100])
+        if self.count <= chunk_size:
+            # torch.quantile refuses inputs with more than 2**24 elements
+            positions = quantiles / 100 * (self.count - 1)
+            lower, fraction = np.floor(positions).astype(int), positions - np.floor(positions)
+            upper = np.minimum(lower + 1, self.count - 1)
+            sorted_values = tensor.detach().reshape(-1).float().sort().values.numpy()
+            # linear interpolation, like np.percentile
+            self.quantiles = (1 - fraction) * sorted_values[lower] + fraction * sorted_values[upper]
+        else:
+            self.quantiles = self.histogram_quantiles(quantiles)
+
+    def histogram_quantiles(self, quantiles, bins=QUANTILE_BINS):
+        """Approximate quantiles (in percent) from a histogram over [min, max], interpolated within the bins; exact at 0 and 100."""
+        if self.max <= self.min:
+            return np.full(len(quantiles), self.min)
+        cumulative = np.concatenate([[0], np.cumsum(self.histogram((self.min, self.max), bins).sum(axis=0))])
+        edges = np.linspace(self.min, self.max, bins + 1)
+        return np.interp(np.asarray(quantiles) / 100 * self.count, cumulative, edges)
+
+    def histogram(self, value_range, bins):
+        """
+        The (batch, bins) histogram counts of every batch over value_range, as np.histogram counts the float32 values
+        (the last bin includes the upper edge).
+        Computed once per range and bin count, one chunk at a time.
+        """
+        low, high = float(value_range[0]), float(value_range[1])
+        key = (low, high, bins)
+        if key not in self.histograms:
+            counts = torch.zeros(self.tensor.shape[0], bins, dtype=torch.long)
+            # np.histogram's algorithm, in the float32 of the chunks like np.histogram of float32 values: the bin from the value,
+            # then moved by one where rounding put it on the wrong side of a bin edge
+            edges = torch.from_numpy(np.linspace(low, high, bins + 1, dtype=np.float32))
+            with torch.no_grad():
+                for index, chunk in iter_chunks(self.tensor, self.chunk_size):
+                    inside = chunk[(chunk >= low) & (chunk <= high)]
+                    bin_index = ((inside - low) / (high - low) * bins).long().clamp(0, bins - 1)
+                    bin_index -= (inside < edges[bin_index]).long()
+                    bin_index += ((inside >= edges[bin_index + 1]) & (bin_index != bins - 1)).long()
+                    counts[index] += torch.bincount(bin_index, minlength=bins)
+            self.histograms[key] = counts.numpy()
+        return self.histograms[key]
+
+
+def sequence_stats(tensors, percentiles=(1, 99), chunk_size=CHUNK_SIZE):
+    """TensorStats of every tensor of a sequence; tensors that already are TensorStats are kept."""
+    return [tensor if isinstance(tensor, TensorStats) else TensorStats(tensor, percentiles, chunk_size) for tensor in tensors]
+
+
+def color_ranges(stats, mode="global"):
+    """
+    The (min, max) the colour scale of each tensor is normalised with.
+    Parameters:
+        - stats (list): TensorStats of the sequence.
+        - mode (str, optional): "global" (one range for the whole sequence, so colours are comparable across frames),
+          "tensor" (the range of each tensor) or "batch" (None: every batch is normalised by its own range). Default is "global".
+    """
+    assert mode in NORMALIZATION_MODES, f"mode must be one of {NORMALIZATION_MODES}, got {mode}"
+    match mode:
+        case "global":
+            return [(min(s.min for s in stats), max(s.max for s in stats))] * len(stats)
+        case "tensor":
+            return [(s.min, s.max) for s in stats]
+        case "batch":
+            return [None] * len(stats)
+
+
+def normalize(values, value_range=None):
+    """Maps values linearly from value_range (default: their own min / max) to [0, 1], clipping what falls outside."""
+    values = np.asarray(values, dtype=float)
+    low, high = (values.min(), values.max()) if value_range is None else value_range
+    return np.clip((values - low) / ((high - low) or 1), 0, 1)
@@ -22,6 +22,7 @@ from manim import (
     Text,
     Write,
 )
+from src.tensorspec.utils.labels import cached_label
 
 
 class Coder(Mobject):
@@ -53,7 +54,7 @@ class Coder(Mobject):
         self.trapezoid = Polygon(bottom_left, bottom_right, top_right, top_left, color=BLACK, fill_opacity=0.5)
         self.trapezoid.rotate(DEGREES * self.rotate_degrees)
 
-        self.label_text = Text(self.label, color=BLACK, font_size=self.font_size)
+        self.label_text = cached_label(Text, self.label, color=BLACK, font_size=self.font_size)
         self.label_text.move_to(self.trapezoid.get_center())
 
         self.add(self.trapezoid, self.label_text)
@@ -2,7 +2,6 @@
 VAE vs Supervised Learning
 """
 
-from itertools import product
 from manim import (
     Arrow,
     DOWN,
@@ -22,6 +21,7 @@ from manim import (
     RIGHT,
 )
 from src.tensorspec.node.net import NetNode
+from src.tensorspec.relation.pairwise import PairwiseArrows
 from pathlib import Path
 
 import toml
@@ -29,6 +29,7 @@ from manim import Arrow, DOWN, BLACK, Group, Mobject, Write, Arrow, Create, Tex,
 from src.tensorspec.matrices.flat import FlatMatrix3D, FlatMatrix3DImage
 from src.tensorspec.vae.coders import Coder
 from src.tensorspec.node.net import NetNode
+from src.tensorspec.utils.labels import cached_label
 import inspect
 
 
@@ -43,6 +44,18 @@ class MM_VAE(Mobject):
         # ===========================================================
         self._make_components()
 
+    @staticmethod
+    def tex_strings(font_size=24):
+        """The Tex labels (cached_label arguments) of an MM_VAE and its nodes; for utils.latex.precompile_tex."""
+        return [
+            *NetNode.tex_strings(text="Latent", text_color=BLACK, text_font_size=32),
+            *NetNode.tex_strings(text=r"$\mu$", text_color=BLACK, text_font_size=42),
+            *NetNode.tex_strings(text=r"$\sigma$", text_color=BLACK, text_font_size=42),
+            *FlatMatrix3D.tex_strings(label=""),
+            (Tex, r"Shared Latent Distribution", {"color": BLACK, "font_size": font_size - 3}),
+            (Tex, r"Sampling $\mathbf{z}$", {"color": BLACK, "font_size": font_size}),
+        ]
+
     def _make_components(self):
         # encoders
         self.encoders = [
@@ -65,26 +78,27 @@ class MM_VAE(Mobject):
         self.latent_sigma = self.latent_sigma.next_to(self.latent_mu, DOWN * 4)
         self.latent_distribution_group = Group(self.latent_mu, self.latent_sigma)
         self.latent_distribution_group.scale(0.7).next_to(self.latent_layers_group, RIGHT * 9)
-        self.latent_label = Tex(r"Shared Latent Distribution", color=BLACK, font_size=self.font_size - 3)
+        self.latent_label = cached_label(Tex, r"Shared Latent Distribution", color=BLACK, font_size=self.font_size - 3)
         self.latent_label = self.latent_label.next_to(self.latent_distribution_group, UP * 2)
 
         self.add(self.latent_mu, self.latent_sigma, self.latent_label)
 
         # now connect each element in [latent layer] and [latent distribution] pairwise with arrows
-        combinations = list(
-            product([i.get_right() for i in self.latent_layers], [self.latent_mu.get_left(), self.latent_sigma.get_left()])
+        self.latent_arrows = PairwiseArrows(
+            _from=(self.latent_layers, RIGHT),
+            to=([self.latent_mu, self.latent_sigma], LEFT),
+            color=BLACK,
+            stroke_width=3,
+            buff=0.4,
         )
-        self.latent_arrows = [
-            Arrow(*combo, color=BLACK, max_tip_length_to_length_ratio=0, stroke_width=3, buff=0.4) for combo in combinations
-        ]
-        self.add(*self.latent_arrows)
+        self.add(self.latent_arrows)
 
         # make ====
         self.vector = FlatMatrix3D(dimensions=(1, 10, 1), label="", main_color=WHITE).scale_to_fit_height(
             self.latent_distribution_group.get_height()
         )
         self.vector = self.vector.next_to(self.latent_distribution_group, RIGHT * 8)
-        self.vector_label = Text("Vector", color=BLACK, font_size=self.font_size).next_to(self.vector, UP)
+        self.vector_label = cached_label(Text, "Vector", color=BLACK, font_size=self.font_size).next_to(self.vector, UP)
 
         self.add(self.vector, self.vector_label)
 
@@ -92,7 +106,7 @@ class MM_VAE(Mobject):
         self.node_sample = Arrow(
             self.latent_distribution_group.get_right(), self.vector.get_left(), color=BLACK, stroke_width=2
         )
-        self.node_sample_label = Tex(r"Sampling $\mathbf{z}$", color=BLACK, font_size=self.font_size)
+        self.node_sample_label = cached_label(Tex, r"Sampling $\mathbf{z}$", color=BLACK, font_size=self.font_size)
         self.node_sample_label = self.node_sample_label.next_to(self.node_sample, UP)
 
         self.add(self.node_sample, self.node_sample_label)
@@ -108,17 +122,10 @@ class MM_VAE(Mobject):
         self.add(self.decoder_group)
 
         # connect vector to each decoder
-        self.decoder_arrows = [
-            Arrow(
-                self.vector.get_right(),
-                decoder.get_left(),
-                color=BLACK,
-                max_tip_length_to_length_ratio=0,
-                stroke_width=3,
-            )
-            for decoder in self.decoders
-        ]
-        self.add(*self.decoder_arrows)
+        self.decoder_arrows = PairwiseArrows(
+            _from=([self.vector], RIGHT), to=(self.decoders, LEFT), color=BLACK, stroke_width=3
+        )
+        self.add(self.decoder_arrows)
 
     def on_create(self):
         transforms = []
@@ -135,10 +142,8 @@ class MM_VAE(Mobject):
         transforms += [Write(self.node_sample_label)]
         for decoder in self.decoders:
             transforms += [*decoder.on_create()]
-        for arrow in self.latent_arrows:
-            transforms += [GrowArrow(arrow)]
-        for arrow in self.decoder_arrows:
-            transforms += [GrowArrow(arrow)]
+        transforms += [*self.latent_arrows.on_create()]
+        transforms += [*self.decoder_arrows.on_create()]
         return transforms
 
 
@@ -153,6 +158,11 @@ class MM_VAE_WITH_DATA(Mobject):
         # -----------------------------------------------------------
         self._make_components()
 
+    @staticmethod
+    def tex_strings(font_size=24):
+        """The Tex labels of MM_VAE_WITH_DATA: the ones of its MM_VAE, the images are labelled with Text."""
+        return MM_VAE.tex_strings(font_size)
+
     def _make_components(self):
         self.vae = MM_VAE(font_size=self.font_size)
 
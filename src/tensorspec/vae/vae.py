@@ -2,6 +2,7 @@ from manim import Arrow, DOWN, BLACK, Group, Mobject, Write, Arrow, Create, Tex,
 from src.tensorspec.matrices.flat import FlatMatrix3D, FlatMatrix3DImage
 from src.tensorspec.vae.coders import Coder
 from src.tensorspec.node.net import NetNode
+from src.tensorspec.utils.labels import cached_label
 import inspect
 from pathlib import Path
 
@@ -17,6 +18,17 @@ class VAE(Mobject):
         # ===========================================================
         self._make_components()
 
+    @staticmethod
+    def tex_strings(font_size=24):
+        """The Tex labels (cached_label arguments) of a VAE and its nodes; for utils.latex.precompile_tex."""
+        return [
+            *NetNode.tex_strings(text=r"$\mu$", text_color=BLACK, text_font_size=42),
+            *NetNode.tex_strings(text=r"$\sigma$", text_color=BLACK, text_font_size=42),
+            *FlatMatrix3D.tex_strings(label=""),
+            (Tex, "Vector", {"color": BLACK, "font_size": font_size}),
+            (Tex, r"Sampling $\mathbf{z}$", {"color": BLACK, "font_size": font_size}),
+        ]
+
     def _make_components(self):
         # make ====
         self.encoder = Coder(edge_ratio=0.5, rotate_degrees=-90, label="Encoder").move_to(ORIGIN)
@@ -24,7 +36,7 @@ class VAE(Mobject):
         self.latent_sigma = NetNode(text=r"$\sigma$", text_color=BLACK, fill_color=BLACK, text_font_size=42)
         self.latent_sigma = self.latent_sigma.next_to(self.latent_mu, DOWN * 4)
         self.latent_distribution = Group(self.latent_mu, self.latent_sigma).scale(0.7).next_to(self.encoder, RIGHT)
-        self.latent_label = Text("Latent Distribution", color=BLACK, font_size=self.font_size)
+        self.latent_label = cached_label(Text, "Latent Distribution", color=BLACK, font_size=self.font_size)
         self.latent_label = self.latent_label.next_to(self.latent_distribution, UP)
 
         self.add(self.encoder, self.latent_mu, self.latent_sigma, self.latent_label)
@@ -34,14 +46,14 @@ class VAE(Mobject):
             self.latent_distribution.get_height()
         )
         self.vector = self.vector.next_to(self.latent_distribution, RIGHT * 8)
-        self.vector_label = Tex("Vector", color=BLACK, font_size=self.font_size).next_to(self.vector, UP)
+        self.vector_label = cached_label(Tex, "Vector", color=BLACK, font_size=self.font_size).next_to(self.vector, UP)
         self.vector_label.align_to(self.latent_label, DOWN)
 
         self.add(self.vector, self.vector_label)
 
         # make ====
         self.node_sample = Arrow(self.latent_distribution.get_right(), self.vector.get_left(), color=BLACK, stroke_width=2)
-        self.node_sample_label = Tex(r"Sampling $\mathbf{z}$", color=BLACK, font_size=self.font_size)
+        self.node_sample_label = cached_label(Tex, r"Sampling $\mathbf{z}$", color=BLACK, font_size=self.font_size)
         self.node_sample_label = self.node_sample_label.next_to(self.node_sample, UP)
 
         self.add(self.node_sample, self.node_sample_label)
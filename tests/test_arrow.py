@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("manim")
+
+from manim import Square, UP, DOWN, LEFT, RIGHT
+from src.tensorspec.relation.arrow import edge_centers, segment_points
+
+
+def test_edge_centers_match_get_edge_center():
+    squares = [Square(side_length=1).shift(RIGHT * 2), Square(side_length=2).shift(UP)]
+    mobjects = [squares[0], squares[1], squares[0]]
+    edges = np.array([UP, LEFT, DOWN])
+    expected = [mobject.get_edge_center(edge) for mobject, edge in zip(mobjects, edges)]
+    assert np.allclose(edge_centers(mobjects, edges), expected)
+
+
+@pytest.mark.parametrize("points_per_curve", [3, 4])
+def test_segment_points_are_straight_curves(points_per_curve):
+    segments = np.array([[[0, 0, 0], [3, 0, 0]], [[3, 0, 0], [3, 3, 0]]], dtype=float)
+    points = segment_points(segments, points_per_curve).reshape(2, points_per_curve, 3)
+    assert np.allclose(points[:, 0], segments[:, 0])
+    assert np.allclose(points[:, -1], segments[:, 1])
+    # the handles are evenly spread along the segment, so the curves are straight lines
+    assert np.allclose(np.diff(points, axis=1), (segments[:, 1:] - segments[:, :1]) / (points_per_curve - 1))
@@ -0,0 +1,42 @@
+import os
+import numpy as np
+
+from src.tensorspec.utils.cache import DiskCache, content_key
+
+
+def test_content_key_depends_on_data_dtype_shape_and_params():
+    array = np.arange(6, dtype=np.float32)
+    key = content_key(array, cmap="seismic", elev=20)
+    assert key == content_key(array.copy(), elev=20, cmap="seismic")  # parameter order doesn't matter
+    assert key != content_key(array.reshape(2, 3), cmap="seismic", elev=20)
+    assert key != content_key(array.astype(np.float64), cmap="seismic", elev=20)
+    assert key != content_key(array, cmap="viridis", elev=20)
+    changed = array.copy()
+    changed[0] = 1
+    assert key != content_key(changed, cmap="seismic", elev=20)
+
+
+def test_disk_cache_renders_once(tmp_path):
+    cache = DiskCache(tmp_path, prefix="plot_", suffix=".txt")
+    calls = []
+
+    def render(path):
+        calls.append(path)
+        path.write_text("data")
+
+    path = cache.fetch("key", render)
+    assert cache.fetch("key", render) == path == tmp_path / "plot_key.txt"
+    assert len(calls) == 1
+    assert path.read_text() == "data"
+    assert not list(tmp_path.glob(".*"))  # the temporary file was moved in place
+    assert cache.get("missing") is None
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=10, suffix=".bin")
+    for i, key in enumerate(["old", "used", "new"]):
+        path = cache.put(key, lambda path: path.write_bytes(b"x" * 5))
+        os.utime(path, (i, i))
+    os.utime(cache.path("old"), (5, 5))  # what get() does on a hit: "old" is now the most recently used
+    cache.evict()
+    assert sorted(path.stem for path in tmp_path.glob("*.bin")) == ["new", "old"]
@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("manim")
+
+from src.tensorspec.matrices.flat import ELLIPSIS_SLOTS, FlatMatrix3D, FlatMatrix3DBase
+
+
+def test_collapse_channels_draws_every_channel_within_the_limit():
+    drawn, slots, ellipsis = FlatMatrix3DBase.collapse_channels(5, max_channels=5)
+    assert drawn.tolist() == slots.tolist() == [0, 1, 2, 3, 4]
+    assert len(ellipsis) == 0
+    drawn, _, _ = FlatMatrix3DBase.collapse_channels(5)
+    assert len(drawn) == 5
+
+
+def test_collapse_channels_keeps_the_back_and_front_channels():
+    drawn, slots, ellipsis = FlatMatrix3DBase.collapse_channels(10, max_channels=5)
+    assert drawn.tolist() == [0, 1, 7, 8, 9]
+    assert slots.tolist() == [0, 1, 2 + ELLIPSIS_SLOTS, 3 + ELLIPSIS_SLOTS, 4 + ELLIPSIS_SLOTS]
+    # three dots, strictly between the last back channel and the first front channel
+    assert len(ellipsis) == 3 and np.all(np.diff(ellipsis) > 0)
+    assert ellipsis[0] > slots[1] and ellipsis[-1] < slots[2]
+
+
+def test_instanced_stacks_need_overlapping_channels():
+    stack = SimpleNamespace(channel_slots=np.arange(3), between_channel_distance=0.75, dimensions_2d=(4, 4))
+    assert FlatMatrix3D.channels_overlap(stack)
+    stack.dimensions_2d = (4, 0.5)  # channels further apart than the matrix is wide fall back to separate rectangles
+    assert not FlatMatrix3D.channels_overlap(stack)
@@ -0,0 +1,40 @@
+import numpy as np
+from PIL import Image
+
+from src.tensorspec.utils.image import IMAGE_CHANNELS, decode_image_channels, load_image_channels
+
+
+def make_image(path, seed=0):
+    pixels = np.random.default_rng(seed).integers(0, 256, (12, 16, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path)
+    return path
+
+
+def test_load_image_channels_repeats_rgb_and_is_shared(tmp_path):
+    image_path = make_image(tmp_path / "image.png")
+    array = load_image_channels(image_path, (8, 6), channels=5)
+    assert array.shape == (5, 6, 8)
+    assert np.array_equal(array, decode_image_channels(image_path, (8, 6), 5))
+    assert np.array_equal(array[3], array[0]) and np.array_equal(array[4], array[1])
+    assert load_image_channels(image_path, (8, 6), channels=5) is array
+    assert not array.flags.writeable
+
+
+def test_load_image_channels_disk_cache_is_bounded(tmp_path):
+    cache_dir = tmp_path / "cache"
+    first = make_image(tmp_path / "first.png", seed=1)
+    load_image_channels(first, (8, 6), cache_dir=cache_dir)
+    (entry,) = cache_dir.glob("image_channels_*.npy")
+    second = make_image(tmp_path / "second.png", seed=2)
+    load_image_channels(second, (8, 6), cache_dir=cache_dir, max_cache_bytes=entry.stat().st_size)
+    assert len(list(cache_dir.glob("image_channels_*.npy"))) == 1
+
+
+def test_load_image_channels_memory_cache_is_bounded(tmp_path):
+    IMAGE_CHANNELS.clear()
+    first = load_image_channels(make_image(tmp_path / "first.png", seed=3), (8, 6))
+    second_path = make_image(tmp_path / "second.png", seed=4)
+    second = load_image_channels(second_path, (8, 6), max_memory_bytes=first.nbytes)
+    (kept,) = IMAGE_CHANNELS.values()  # the least recently used array is evicted
+    assert kept is second
+    assert load_image_channels(second_path, (8, 6), max_memory_bytes=first.nbytes) is second
@@ -0,0 +1,24 @@
+import pytest
+
+pytest.importorskip("manim")
+
+from manim import Tex
+from manim.mobject.text import tex_mobject
+from src.tensorspec.utils.latex import tex_request
+
+
+class BrokenTex(Tex):
+    def __init__(self, *args, **kwargs):
+        raise RuntimeError("broken label")
+
+
+def test_tex_request_reads_the_expression_without_latex():
+    expression, environment, _ = tex_request(Tex, "$x^2$", {})
+    assert "x^2" in expression and environment == "center"
+
+
+def test_tex_request_restores_manim_after_a_failure():
+    compile_svg = tex_mobject.tex_to_svg_file
+    with pytest.raises(RuntimeError):
+        tex_request(BrokenTex, "x", {})
+    assert tex_mobject.tex_to_svg_file is compile_svg
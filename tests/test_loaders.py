@@ -0,0 +1,38 @@
+import numpy as np
+import torch
+
+from src.tensorspec.utils.loaders import as_tensor, iter_chunks, load_tensor
+from src.tensorspec.utils.stats import TensorStats
+
+
+def test_load_tensor_memory_maps_npy(tmp_path):
+    array = np.arange(24, dtype=np.float32).reshape(1, 2, 3, 4)
+    np.save(tmp_path / "tensor.npy", array)
+    tensor = load_tensor(tmp_path / "tensor.npy")
+    assert torch.equal(tensor, torch.from_numpy(array))
+    assert torch.equal(as_tensor(str(tmp_path / "tensor.npy")), tensor)
+    assert as_tensor(tensor) is tensor
+
+
+def test_load_tensor_picks_a_key_from_pt(tmp_path):
+    tensors = {"a": torch.zeros(1, 2), "b": torch.ones(3)}
+    torch.save(tensors, tmp_path / "tensors.pt")
+    assert torch.equal(load_tensor(tmp_path / "tensors.pt", key="b"), tensors["b"])
+
+
+def test_iter_chunks_covers_every_batch():
+    tensor = torch.arange(2 * 10, dtype=torch.int32).view(2, 10)
+    chunks = list(iter_chunks(tensor, chunk_size=4))
+    assert [index for index, _ in chunks] == [0, 0, 0, 1, 1, 1]
+    assert [len(chunk) for _, chunk in chunks] == [4, 4, 2] * 2
+    assert torch.equal(torch.cat([chunk for _, chunk in chunks]), tensor.flatten().float())
+
+
+def test_chunked_tensor_stats_match_one_chunk():
+    tensor = torch.randperm(2 * 3 * 16 * 16).float().view(2, 3, 16, 16)
+    exact, chunked = TensorStats(tensor), TensorStats(tensor, chunk_size=100)
+    assert np.isclose(chunked.mean, exact.mean, atol=1e-6) and np.isclose(chunked.std, exact.std, rtol=1e-5)
+    assert np.allclose(chunked.batch_mean, exact.batch_mean, atol=1e-6)
+    assert (chunked.min, chunked.max) == (exact.min, exact.max)
+    # histogram quantiles interpolate at q * n rather than q * (n - 1): within one sample spacing of the exact ones
+    assert np.allclose(chunked.quantiles, exact.quantiles, atol=1)
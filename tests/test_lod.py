@@ -0,0 +1,55 @@
+import numpy as np
+import torch
+
+from src.tensorspec.utils.lod import lod_shape, pool_tensor, pool_tensor_chunked, pool_to_budget
+
+
+def test_lod_shape_fits_the_budget():
+    assert lod_shape((4, 8, 8), 1000) == (4, 8, 8)
+    shape = lod_shape((64, 64, 64), 4096)
+    assert np.prod(shape) <= 4096 and shape == (16, 16, 16)
+    # an axis that would shrink below one voxel is kept at one and leaves its share to the others
+    shape = lod_shape((2, 256, 256), 64)
+    assert shape[0] == 1 and np.prod(shape) <= 64
+
+
+def test_pool_tensor_modes():
+    tensor = torch.tensor([1.0, -5.0, 2.0, 3.0]).view(1, 1, 2, 2)
+    assert pool_tensor(tensor, (1, 1, 1), "mean").item() == 0.25
+    assert pool_tensor(tensor, (1, 1, 1), "max").item() == 3.0
+    assert pool_tensor(tensor, (1, 1, 1), "absmax").item() == -5.0  # signed, largest magnitude
+
+
+def test_pool_to_budget_leaves_small_tensors_alone():
+    tensor = torch.rand(2, 3, 4, 4)
+    assert pool_to_budget(tensor, 1000) is tensor
+    assert pool_to_budget(tensor, 12).shape[1:].numel() <= 12
+
+
+class RecordingTensor:
+    """A tensor that records the number of elements of every slice read from it."""
+
+    def __init__(self, tensor):
+        self.tensor, self.shape, self.reads = tensor, tensor.shape, []
+
+    def __getitem__(self, key):
+        part = self.tensor[key]
+        self.reads.append(part.numel())
+        return part
+
+
+def test_pool_tensor_chunked_matches_pool_tensor():
+    tensor = torch.randn(2, 7, 9, 9)
+    for mode in ("mean", "max", "absmax"):
+        chunked = pool_tensor_chunked(tensor, (3, 4, 4), mode, chunk_size=20)
+        assert torch.allclose(chunked, pool_tensor(tensor, (3, 4, 4), mode), atol=1e-6)
+    assert torch.allclose(pool_to_budget(tensor, 48, chunk_size=10), pool_to_budget(tensor, 48), atol=1e-6)
+
+
+def test_pool_tensor_chunked_bounds_the_reads_of_few_channel_tensors():
+    tensor = torch.randn(1, 1, 300, 500)
+    recording = RecordingTensor(tensor)
+    for mode in ("mean", "max", "absmax"):
+        chunked = pool_tensor_chunked(recording, (1, 7, 11), mode, chunk_size=1000)
+        assert torch.allclose(chunked, pool_tensor(tensor, (1, 7, 11), mode), atol=1e-5)
+    assert max(recording.reads) <= 1000
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("manim")
+
+from src.tensorspec.components.matrices import voxel_faces, voxel_layers, faces_to_vmobjects
+
+
+def test_voxel_faces_culls_shared_faces_of_touching_voxels():
+    corners, normals, voxel_index = voxel_faces(np.ones((2, 2, 2), dtype=bool), spacing=1, side_length=1)
+    assert corners.shape == (24, 4, 3)  # 4 outer faces on each of the 6 sides
+    assert np.all(np.abs(normals).sum(axis=1) == 1)
+    # every face lies on the outer surface of the grid, which spans [-0.5, 1.5] on each axis
+    face_centers = corners.mean(axis=1)
+    assert np.all(np.isin(face_centers[np.abs(normals) == 1], (-0.5, 1.5)))
+    assert np.bincount(voxel_index).tolist() == [3] * 8
+
+
+def test_voxel_faces_keeps_every_face_with_gaps():
+    corners, _, voxel_index = voxel_faces(np.ones((2, 2, 2), dtype=bool), spacing=0.12, side_length=0.1)
+    assert corners.shape == (48, 4, 3)
+    assert np.bincount(voxel_index).tolist() == [6] * 8
+
+
+def test_voxel_faces_culls_back_faces_with_gaps():
+    view = np.array([1.0, -1.0, 0.0])
+    corners, normals, voxel_index = voxel_faces(np.ones((2, 2, 2), dtype=bool), spacing=0.12, side_length=0.1, view=view)
+    assert corners.shape == (16, 4, 3)  # +x and -y of every voxel; the z faces are seen edge on
+    assert np.all(normals @ view > 0)
+
+
+def test_voxel_layers_put_hiding_voxels_later():
+    shape, view = (3, 4, 5), np.array([0.5, 0.0, -0.8])
+    voxel_index = np.arange(np.prod(shape))
+    normals = np.broadcast_to([1.0, 0.0, 0.0], (len(voxel_index), 3))
+    layers = voxel_layers(voxel_index, normals, shape, view).reshape(shape)
+    assert layers.min() == 1  # front faces of the voxel furthest from the camera
+    # one layer (front and back half) further per step towards the camera; y doesn't change the depth
+    assert np.all(np.diff(layers, axis=0) == 2) and np.all(np.diff(layers, axis=2) == -2)
+    assert np.all(np.diff(layers, axis=1) == 0)
+    back_faces = voxel_layers(voxel_index, -normals, shape, view).reshape(shape)
+    assert np.all(back_faces == layers - 1)
+
+
+def test_voxel_faces_skips_empty_voxels():
+    occupied = np.zeros((3, 1, 1), dtype=bool)
+    occupied[[0, 2]] = True
+    _, _, voxel_index = voxel_faces(occupied, spacing=1, side_length=1)
+    assert sorted(set(voxel_index.tolist())) == [0, 2]
+    assert len(voxel_index) == 12
+
+
+def test_faces_to_vmobjects_keeps_the_drawing_order():
+    corners = np.arange(4)[:, None, None] + np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0]], dtype=float)
+    vmobjects = faces_to_vmobjects(corners, np.array([0, 0, 1, 0]), num_color_levels=2)
+    assert len(vmobjects) == 3  # the last face doesn't join the first run; it is drawn after the red face
+    first_points = [vmobject.points[0] for vmobject in vmobjects]
+    assert [point[0] for point in first_points] == [0, 2, 3]
+
+
+def test_faces_to_vmobjects_merges_layers_of_random_data():
+    shape, view = (16, 32, 32), np.array([0.5, 0.0, 0.866])
+    corners, normals, voxel_index = voxel_faces(np.ones(shape, dtype=bool), spacing=0.12, side_length=0.1, view=view)
+    layers = voxel_layers(voxel_index, normals, shape, view)
+    alphas = np.random.default_rng(0).random(np.prod(shape))[voxel_index]
+    vmobjects = faces_to_vmobjects(corners, alphas, layers=layers)
+    assert len(vmobjects) < len(corners) / 10
+    assert sum(len(vmobject.points) for vmobject in vmobjects) == len(corners) * 4 * 4  # every face kept, 4 cubic curves
@@ -0,0 +1,20 @@
+import torch
+import pytest
+
+pytest.importorskip("manim")
+
+from src.tensorspec.components.matrices_plt import channel_style, sequence_output, raster_dpi
+
+
+def test_sequence_output_is_raster_once_one_tensor_is_large():
+    tensors = [torch.rand(1, 2, 2, 2), torch.rand(3, 8, 8, 8)]
+    output, dpi = sequence_output(tensors, "auto", raster_threshold=100)
+    assert output == "raster"
+    assert dpi == raster_dpi(3)
+    # the small tensor gets the same format and size as the large one
+    assert channel_style(tensors[0], {}, output, dpi=dpi) == channel_style(tensors[1], {}, output, dpi=dpi)
+
+
+def test_sequence_output_keeps_small_sequences_vector():
+    assert sequence_output([torch.rand(1, 2, 2, 2)] * 2, "auto", raster_threshold=100) == ("vector", None)
+    assert sequence_output([torch.rand(1, 2, 2, 2)], "raster")[0] == "raster"
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("manim")
+
+from src.tensorspec.components.matrices import voxel_faces
+from src.tensorspec.components.matrices_proj import project_voxels
+
+
+def test_project_voxels_orders_faces_back_to_front():
+    elev, azim = np.radians(20), np.radians(-30)
+    eye = np.array([np.cos(elev) * np.cos(azim), np.cos(elev) * np.sin(azim), np.sin(elev)])
+    polygons, voxel_index, layers = project_voxels((2, 3, 4), elev=20, azim=-30, spacing=1)
+    assert polygons.shape == (len(voxel_index), 4, 3) and layers.shape == voxel_index.shape
+    assert np.all(polygons[..., 2] == 0)
+
+    # the same faces, in the order project_voxels returns them, get closer to the camera
+    corners, _, unsorted_index = voxel_faces(np.ones((2, 3, 4), dtype=bool), 1, 1)
+    depth = corners.mean(axis=1) @ eye
+    order = np.argsort(depth, kind="stable")
+    assert np.array_equal(voxel_index, unsorted_index[order])
+    assert np.all(np.diff(depth[order]) >= 0)
+
+
+def test_project_voxels_backface_culling_keeps_the_visible_half():
+    polygons, _, layers = project_voxels((1, 1, 1), cull_backfaces=False)
+    culled, _, _ = project_voxels((1, 1, 1), cull_backfaces=True)
+    assert len(polygons) == 6
+    assert len(culled) == 3
+    assert sorted(layers.tolist()) == [0, 0, 0, 1, 1, 1]  # the back faces are drawn before the front faces
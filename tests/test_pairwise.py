@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("manim")
+
+from manim import Square, LEFT, RIGHT
+from src.tensorspec.relation.pairwise import PairwiseArrows
+
+STARTS = np.array([[0, y, 0] for y in range(3)], dtype=float)
+ENDS = np.array([[5, y, 0] for y in range(2)], dtype=float)
+
+
+def make_arrows(**kwargs):
+    sources = [Square(side_length=1).move_to(point) for point in STARTS]
+    targets = [Square(side_length=1).move_to(point) for point in ENDS]
+    return PairwiseArrows(_from=(sources, RIGHT), to=(targets, LEFT), **kwargs)
+
+
+def test_segments_connect_every_pair():
+    segments, at_mobject = make_arrows()._segments(STARTS, ENDS)
+    assert segments.shape == (6, 2, 3)
+    assert {(tuple(start), tuple(end)) for start, end in segments} == {
+        (tuple(start), tuple(end)) for start in STARTS for end in ENDS
+    }
+    assert at_mobject.all()
+
+
+def test_segments_bundle_through_one_hub():
+    segments, at_mobject = make_arrows(max_arrows=4)._segments(STARTS, ENDS)
+    assert segments.shape == (5, 2, 3)  # M + N instead of M x N
+    hub = (STARTS.mean(axis=0) + ENDS.mean(axis=0)) / 2
+    assert np.allclose(segments[:3, 1], hub) and np.allclose(segments[3:, 0], hub)
+    assert not at_mobject[:3, 1].any() and not at_mobject[3:, 0].any()  # no buff at the hub
+
+
+def test_segments_thin_to_the_budget():
+    segments, _ = make_arrows(max_arrows=4, reduction="thin")._segments(STARTS, ENDS)
+    assert len(segments) == 4
+    assert {tuple(start) for start in segments[:, 0]} == {tuple(start) for start in STARTS}
+    assert {tuple(end) for end in segments[:, 1]} == {tuple(end) for end in ENDS}
+
+
+@pytest.mark.parametrize("num_from, num_to, max_arrows", [(10, 10, 11), (8, 8, 9), (20, 5, 21), (3, 20, 25)])
+def test_segments_thin_covers_every_mobject(num_from, num_to, max_arrows):
+    starts = np.stack([np.zeros(num_from), np.arange(num_from), np.zeros(num_from)], axis=1)
+    ends = np.stack([np.full(num_to, 5.0), np.arange(num_to), np.zeros(num_to)], axis=1)
+    segments, _ = make_arrows(max_arrows=max_arrows, reduction="thin")._segments(starts, ends)
+    assert len({(tuple(start), tuple(end)) for start, end in segments}) == max_arrows
+    from_counts = np.bincount(segments[:, 0, 1].astype(int), minlength=num_from)
+    to_counts = np.bincount(segments[:, 1, 1].astype(int), minlength=num_to)
+    assert from_counts.min() >= 1 and from_counts.max() - from_counts.min() <= 1
+    assert to_counts.min() >= 1 and to_counts.max() - to_counts.min() <= 1
+
+
+def test_grow_starts_every_line_at_its_start():
+    arrows = make_arrows()
+    (animation,) = arrows.on_create()
+    arrows.grow(arrows, 0)
+    curves = arrows.points.reshape(arrows.num_arrows, -1, 3)
+    assert np.allclose(curves, curves[:, :1])
+    arrows.grow(arrows, 1)
+    assert np.allclose(arrows.points, arrows.grown_points)
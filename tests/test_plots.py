@@ -0,0 +1,40 @@
+import numpy as np
+import torch
+import pytest
+
+pytest.importorskip("manim")
+
+from src.tensorspec.components.plots import binned_kde, histogram_layout
+
+
+def exact_kde(values, grid, sigma):
+    return np.exp(-0.5 * ((grid[:, None] - values[None]) / sigma) ** 2).sum(axis=1) / (len(values) * sigma * np.sqrt(2 * np.pi))
+
+
+def test_binned_kde_matches_the_exact_kde():
+    values = np.random.default_rng(0).normal(size=5000)
+    grid, density = binned_kde(values, (-5, 5), grid_size=1024, bw_method=0.2)
+    assert np.isclose(density.sum() * (grid[1] - grid[0]), 1, atol=1e-3)
+    expected = exact_kde(values, grid, 0.2 * np.std(values, ddof=1))
+    assert np.abs(density - expected).max() < 0.01 * expected.max()
+
+
+def test_binned_kde_of_constant_values_stays_finite():
+    grid, density = binned_kde(np.full(10, 0.5), (0, 1), grid_size=64)
+    assert np.all(np.isfinite(density)) and grid[np.argmax(density)] == pytest.approx(0.5, abs=1 / 64)
+
+
+def test_histogram_layout_ranges_and_bins():
+    tensors = [torch.linspace(0, 1, 1000).view(1, 10, 10, 10), torch.linspace(-2, 3, 1000).view(1, 10, 10, 10)]
+    shared = histogram_layout(tensors, "data", shared=True, num_bins=20)
+    assert shared == [((-2.0, 3.0), 20)] * 2
+    separate = histogram_layout(tensors, "data", shared=False, num_bins=20)
+    assert [value_range for value_range, _ in separate] == [(0.0, 1.0), (-2.0, 3.0)]
+    assert histogram_layout(tensors, "unit", shared=False, num_bins=20)[1][0] == (0.0, 1.0)
+    ((low, high), bins), _ = histogram_layout(tensors, "robust", shared=False, min_bins=10, max_bins=50)
+    assert 0 < low < 0.02 and 0.98 < high < 1 and 10 <= bins <= 50
+
+
+def test_histogram_layout_of_constant_tensor_has_a_width():
+    (((low, high), _),) = histogram_layout([torch.ones(1, 1, 2, 5)], "data")
+    assert high - low == 1.0
@@ -0,0 +1,38 @@
+import numpy as np
+import torch
+
+from src.tensorspec.utils.stats import TensorStats, color_ranges, normalize
+
+
+def test_tensor_stats_match_numpy():
+    tensor = torch.randn(3, 4, 5, 6)
+    values = tensor.numpy()
+    stats = TensorStats(tensor, percentiles=(5, 95))
+    assert np.isclose(stats.mean, values.mean()) and np.isclose(stats.std, values.std(ddof=1))
+    assert np.allclose(stats.batch_mean, values.reshape(3, -1).mean(axis=1))
+    assert np.allclose(stats.batch_std, values.reshape(3, -1).std(axis=1, ddof=1))
+    assert np.allclose(stats.quantiles, np.percentile(values, [0, 5, 25, 75, 95, 100]), atol=1e-6)
+    assert (stats.min, stats.max) == (float(values.min()), float(values.max()))
+
+
+def test_tensor_stats_histogram_matches_numpy():
+    tensor = torch.randn(2, 3, 8, 8)
+    counts = TensorStats(tensor).histogram((-1, 1), 10)
+    expected = [np.histogram(batch, bins=10, range=(-1, 1))[0] for batch in tensor.numpy().reshape(2, -1)]
+    assert np.array_equal(counts, expected)
+
+
+def test_tensor_stats_histogram_matches_numpy_near_the_bin_edges():
+    low, high, bins = -1.3, 2.9, 73
+    tensor = torch.linspace(low, high, bins * 40 + 1).view(1, 1, 1, -1)  # every 40th value is on a bin edge
+    counts = TensorStats(tensor).histogram((low, high), bins)
+    assert np.array_equal(counts[0], np.histogram(tensor.numpy(), bins=bins, range=(low, high))[0])
+
+
+def test_color_ranges_and_normalize():
+    stats = [TensorStats(torch.zeros(1, 1, 1, 2)), TensorStats(torch.tensor([-1.0, 3.0]).view(1, 1, 1, 2))]
+    assert color_ranges(stats, "global") == [(-1.0, 3.0)] * 2
+    assert color_ranges(stats, "tensor") == [(0.0, 0.0), (-1.0, 3.0)]
+    assert color_ranges(stats, "batch") == [None, None]
+    assert np.allclose(normalize([-2, 1, 5], (-1, 3)), [0, 0.5, 1])
+    assert np.allclose(normalize([2, 2]), [0, 0])  # constant values don't divide by zero